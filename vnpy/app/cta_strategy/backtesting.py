@@ -1,10 +1,12 @@
 from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Callable
+from typing import Callable, Dict, Optional, Tuple
 from itertools import product
-from functools import lru_cache
+from functools import lru_cache, partial
 from time import time
 import multiprocessing
+from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.shared_memory import SharedMemory
 import random
 import traceback
 
@@ -16,9 +18,9 @@ from deap import creator, base, tools, algorithms
 
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
-from vnpy.trader.database import database_manager
+from vnpy.trader.database.datafile import get_backtesting_source
 from vnpy.trader.object import OrderData, TradeData, BarData, TickData
-from vnpy.trader.utility import round_to
+from vnpy.trader.utility import round_to, BarArray, BAR_DTYPE, MatchingBook
 
 from .base import (
     BacktestingMode,
@@ -31,6 +33,10 @@ from .base import (
 from .template import CtaTemplate
 
 
+# Targets which can only get worse as backtesting goes on
+MONOTONIC_TARGETS = {"max_drawdown", "max_ddpercent"}
+
+
 # Set deap algo
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMax)
@@ -45,6 +51,7 @@ class OptimizationSetting:
         """"""
         self.params = {}
         self.target_name = ""
+        self.prune_rules = {}
 
     def add_parameter(
         self, name: str, start: float, end: float = None, step: float = None
@@ -75,6 +82,46 @@ class OptimizationSetting:
         """"""
         self.target_name = target_name
 
+    def set_max_ddpercent(self, percent: float):
+        """
+        Abort backtesting once drawdown exceeds percent of high level.
+        """
+        self.prune_rules["max_ddpercent"] = abs(percent)
+
+    def set_min_balance(self, balance: float):
+        """
+        Abort backtesting once balance falls below given value.
+        """
+        self.prune_rules["min_balance"] = balance
+
+    def set_min_trade_count(self, count: int, check_date: date):
+        """
+        Abort backtesting if trade count is less than count by check date.
+        """
+        self.prune_rules["min_trade_count"] = (count, check_date)
+
+    def set_prune_by_target(self, prune: bool = True):
+        """
+        Abort backtesting once it cannot beat current best target value.
+
+        Only works for targets which keep getting worse during
+        backtesting, such as max_drawdown and max_ddpercent, which is
+        checked in get_prune_rules after target is set.
+        """
+        self.prune_rules["target"] = prune
+
+    def get_prune_rules(self) -> dict:
+        """
+        Get prune rules supported by current target.
+        """
+        prune_rules = dict(self.prune_rules)
+
+        if prune_rules.get("target", False) and self.target_name not in MONOTONIC_TARGETS:
+            print(f"优化目标{self.target_name}不支持提前终止")
+            prune_rules.pop("target")
+
+        return prune_rules
+
     def generate_setting(self):
         """"""
         keys = self.params.keys()
@@ -119,6 +166,8 @@ class BacktestingEngine:
         self.risk_free: float = 0.02
         self.mode = BacktestingMode.BAR
         self.inverse = False
+        self.columnar = False
+        self.streaming = False
 
         self.strategy_class = None
         self.strategy = None
@@ -134,10 +183,12 @@ class BacktestingEngine:
         self.stop_order_count = 0
         self.stop_orders = {}
         self.active_stop_orders = {}
+        self.stop_book = MatchingBook(stop=True)
 
         self.limit_order_count = 0
         self.limit_orders = {}
         self.active_limit_orders = {}
+        self.limit_book = MatchingBook()
 
         self.trade_count = 0
         self.trades = {}
@@ -147,6 +198,15 @@ class BacktestingEngine:
         self.daily_results = {}
         self.daily_df = None
 
+        self.daily_result = None
+        self.daily_statistics = None
+        self.pending_trades = []
+
+        self.prune_rules = {}
+        self.target_name = ""
+        self.best_value = None
+        self.pruned = False
+
     def clear_data(self):
         """
         Clear all data of last backtesting.
@@ -159,10 +219,12 @@ class BacktestingEngine:
         self.stop_order_count = 0
         self.stop_orders.clear()
         self.active_stop_orders.clear()
+        self.stop_book.clear()
 
         self.limit_order_count = 0
         self.limit_orders.clear()
         self.active_limit_orders.clear()
+        self.limit_book.clear()
 
         self.trade_count = 0
         self.trades.clear()
@@ -170,6 +232,12 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
 
+        self.daily_result = None
+        self.daily_statistics = None
+        self.pending_trades.clear()
+
+        self.pruned = False
+
     def set_parameters(
         self,
         vt_symbol: str,
@@ -183,9 +251,19 @@ class BacktestingEngine:
         end: datetime = None,
         mode: BacktestingMode = BacktestingMode.BAR,
         inverse: bool = False,
-        risk_free: float = 0
+        risk_free: float = 0,
+        columnar: bool = False,
+        streaming: bool = False
     ):
-        """"""
+        """
+        Set parameters of backtesting.
+
+        With columnar enabled, bar history is kept in numpy arrays and
+        BarData objects are only created during replay.
+
+        With streaming enabled, daily pnl, balance and drawdown are
+        calculated as each day closes during replay.
+        """
         self.mode = mode
         self.vt_symbol = vt_symbol
         self.interval = Interval(interval)
@@ -203,6 +281,8 @@ class BacktestingEngine:
         self.mode = mode
         self.inverse = inverse
         self.risk_free = risk_free
+        self.columnar = columnar
+        self.streaming = streaming
 
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
@@ -222,7 +302,13 @@ class BacktestingEngine:
             self.output("起始日期必须小于结束日期")
             return
 
-        self.history_data.clear()       # Clear previously loaded history data
+        # Clear previously loaded history data
+        if self.mode == BacktestingMode.BAR and self.columnar:
+            self.history_data = BarArray.from_bars(
+                [], self.symbol, self.exchange, self.interval
+            )
+        else:
+            self.history_data = []
 
         # Load 30 days of data each time and allow for progress update
         total_days = (self.end - self.start).days
@@ -234,29 +320,42 @@ class BacktestingEngine:
         end = self.start + progress_delta
         progress = 0
 
+        # Bar arrays of each chunk are concatenated once after loading
+        arrays = []
+
         while start < self.end:
             progress_bar = "#" * int(progress * 10 + 1)
             self.output(f"加载进度：{progress_bar} [{progress:.0%}]")
 
             end = min(end, self.end)  # Make sure end time stays within set range
 
-            if self.mode == BacktestingMode.BAR:
-                data = load_bar_data(
+            if self.mode == BacktestingMode.BAR and self.columnar:
+                data = load_bar_array(
                     self.symbol,
                     self.exchange,
                     self.interval,
                     start,
                     end
                 )
+                arrays.append(data)
             else:
-                data = load_tick_data(
-                    self.symbol,
-                    self.exchange,
-                    start,
-                    end
-                )
-
-            self.history_data.extend(data)
+                if self.mode == BacktestingMode.BAR:
+                    data = load_bar_data(
+                        self.symbol,
+                        self.exchange,
+                        self.interval,
+                        start,
+                        end
+                    )
+                else:
+                    data = load_tick_data(
+                        self.symbol,
+                        self.exchange,
+                        start,
+                        end
+                    )
+
+                self.history_data.extend(data)
 
             progress += progress_days / total_days
             progress = min(progress, 1)
@@ -264,6 +363,9 @@ class BacktestingEngine:
             start = end + interval_delta
             end += progress_delta
 
+        if arrays:
+            self.history_data = self.history_data.concat(*arrays)
+
         self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
 
     def run_backtesting(self):
@@ -301,6 +403,15 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("开始回放历史数据")
 
+        if self.streaming:
+            self.daily_statistics = DailyStatistics(
+                self.capital,
+                self.size,
+                self.rate,
+                self.slippage,
+                self.inverse
+            )
+
         # Use the rest of history data for running backtesting
         backtesting_data = self.history_data[ix:]
         if not backtesting_data:
@@ -315,6 +426,10 @@ class BacktestingEngine:
             for data in batch_data:
                 try:
                     func(data)
+                except PruneException as e:
+                    self.pruned = True
+                    self.output(f"触发提前终止条件：{e}，回测终止")
+                    return
                 except Exception:
                     self.output("触发异常，回测终止")
                     self.output(traceback.format_exc())
@@ -335,28 +450,32 @@ class BacktestingEngine:
             self.output("成交记录为空，无法计算")
             return
 
-        # Add trade data into daily reuslt.
-        for trade in self.trades.values():
-            d = trade.datetime.date()
-            daily_result = self.daily_results[d]
-            daily_result.add_trade(trade)
-
-        # Calculate daily result by iteration.
-        pre_close = 0
-        start_pos = 0
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_close,
-                start_pos,
-                self.size,
-                self.rate,
-                self.slippage,
-                self.inverse
-            )
+        # Daily results are already calculated during replay in streaming mode
+        if self.streaming:
+            self.close_last_daily_result()
+        else:
+            # Add trade data into daily reuslt.
+            for trade in self.trades.values():
+                d = trade.datetime.date()
+                daily_result = self.daily_results[d]
+                daily_result.add_trade(trade)
+
+            # Calculate daily result by iteration.
+            pre_close = 0
+            start_pos = 0
+
+            for daily_result in self.daily_results.values():
+                daily_result.calculate_pnl(
+                    pre_close,
+                    start_pos,
+                    self.size,
+                    self.rate,
+                    self.slippage,
+                    self.inverse
+                )
 
-            pre_close = daily_result.close_price
-            start_pos = daily_result.end_pos
+                pre_close = daily_result.close_price
+                start_pos = daily_result.end_pos
 
         # Generate dataframe
         results = defaultdict(list)
@@ -371,15 +490,71 @@ class BacktestingEngine:
         return self.daily_df
 
     def calculate_statistics(self, df: DataFrame = None, output=True):
-        """"""
+        """
+        Calculate statistics from daily result DataFrame. In streaming mode
+        without DataFrame generated, running daily statistics are used.
+        """
         self.output("开始计算策略统计指标")
 
         # Check DataFrame input exterior
         if df is None:
             df = self.daily_df
 
+        # Use running statistics updated during replay in streaming mode
+        if (
+            df is None
+            and self.streaming
+            and self.trades
+            and self.daily_statistics
+            and self.daily_statistics.total_days
+        ):
+            statistics = self.daily_statistics
+
+            start_date = statistics.start_date
+            end_date = statistics.end_date
+
+            total_days = statistics.total_days
+            profit_days = statistics.profit_days
+            loss_days = statistics.loss_days
+
+            end_balance = statistics.balance
+            max_drawdown = statistics.max_drawdown
+            max_ddpercent = statistics.max_ddpercent
+            max_drawdown_duration = statistics.max_drawdown_duration
+
+            total_net_pnl = statistics.total_net_pnl
+            daily_net_pnl = total_net_pnl / total_days
+
+            total_commission = statistics.total_commission
+            daily_commission = total_commission / total_days
+
+            total_slippage = statistics.total_slippage
+            daily_slippage = total_slippage / total_days
+
+            total_turnover = statistics.total_turnover
+            daily_turnover = total_turnover / total_days
+
+            total_trade_count = statistics.total_trade_count
+            daily_trade_count = total_trade_count / total_days
+
+            total_return = (end_balance / self.capital - 1) * 100
+            annual_return = total_return / total_days * 240
+            daily_return = statistics.return_mean * 100
+            return_std = statistics.get_return_std() * 100
+
+            if return_std:
+                daily_risk_free = self.risk_free / np.sqrt(240)
+                sharpe_ratio = (daily_return - daily_risk_free) / return_std * np.sqrt(240)
+            else:
+                sharpe_ratio = 0
+
+            if max_ddpercent:
+                return_drawdown_ratio = -total_return / max_ddpercent
+            else:
+                return_drawdown_ratio = 0
+
         # Check for init DataFrame
-        if df is None:
+        elif df is None:
             # Set all statistics to 0 if no trade.
             start_date = ""
             end_date = ""
@@ -585,8 +760,18 @@ class BacktestingEngine:
         fig.update_layout(height=1000, width=1000)
         fig.show()
 
-    def run_optimization(self, optimization_setting: OptimizationSetting, output=True):
-        """"""
+    def run_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        output=True,
+        share_data: bool = False
+    ):
+        """
+        Run exhaustive optimization with multiprocessing pool.
+
+        With share_data enabled, bar history is loaded once in current
+        process and attached by all worker processes through shared memory.
+        """
         # Get optimization setting and target
         settings = optimization_setting.generate_setting()
         target_name = optimization_setting.target_name
@@ -599,36 +784,73 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
+        # Load history data into shared memory once for all processes
+        shm = None
+        history_info = None
+
+        if share_data:
+            if self.mode != BacktestingMode.BAR:
+                self.output("共享历史数据仅支持K线回测模式")
+                return
+
+            shm, history_info = self.share_history_data()
+            if not shm:
+                return
+
         # Use multiprocessing pool for running backtesting with different setting
         # Force to use spawn method to create new process (instead of fork on Linux)
         ctx = multiprocessing.get_context("spawn")
-        pool = ctx.Pool(multiprocessing.cpu_count())
-
-        results = []
-        for setting in settings:
-            result = (pool.apply_async(optimize, (
-                target_name,
-                self.strategy_class,
-                setting,
-                self.vt_symbol,
-                self.interval,
-                self.start,
-                self.rate,
-                self.slippage,
-                self.size,
-                self.pricetick,
-                self.capital,
-                self.end,
-                self.mode,
-                self.inverse
-            )))
-            results.append(result)
+        pool = None
+
+        try:
+            best_value = ctx.Value("d", -np.inf)
+            pool = ctx.Pool(
+                multiprocessing.cpu_count(),
+                initializer=init_optimize_process,
+                initargs=(best_value,)
+            )
+
+            prune_rules = optimization_setting.get_prune_rules()
+            callback = partial(update_best_value_by_result, best_value)
 
-        pool.close()
-        pool.join()
+            results = []
+            for setting in settings:
+                result = (pool.apply_async(optimize, (
+                    target_name,
+                    self.strategy_class,
+                    setting,
+                    self.vt_symbol,
+                    self.interval,
+                    self.start,
+                    self.rate,
+                    self.slippage,
+                    self.size,
+                    self.pricetick,
+                    self.capital,
+                    self.end,
+                    self.mode,
+                    self.inverse,
+                    self.columnar,
+                    history_info,
+                    self.streaming,
+                    prune_rules
+                ), callback=callback))
+                results.append(result)
+
+            pool.close()
+            pool.join()
+
+            result_values = [result.get() for result in results]
+        finally:
+            # Release pool and shared memory even if optimization failed
+            if pool:
+                pool.terminate()
+
+            if shm:
+                shm.close()
+                shm.unlink()
 
         # Sort results and output
-        result_values = [result.get() for result in results]
         result_values.sort(reverse=True, key=lambda result: result[1])
 
         if output:
@@ -638,8 +860,41 @@ class BacktestingEngine:
 
         return result_values
 
-    def run_ga_optimization(self, optimization_setting: OptimizationSetting, population_size=100, ngen_size=30, output=True):
-        """"""
+    def share_history_data(self) -> Tuple[Optional[SharedMemory], Optional[dict]]:
+        """
+        Load bar history and copy it into a shared memory block.
+        """
+        self.load_data()
+
+        history = self.history_data
+        if not isinstance(history, BarArray):
+            history = BarArray.from_bars(
+                history, self.symbol, self.exchange, self.interval
+            )
+
+        if not len(history):
+            self.output("历史数据为空，无法共享")
+            return None, None
+
+        shm, history_info = share_bar_array(history)
+        self.output(f"历史数据已载入共享内存：{shm.name}")
+
+        return shm, history_info
+
+    def run_ga_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        population_size=100,
+        ngen_size=30,
+        output=True,
+        share_data: bool = False
+    ):
+        """
+        Run genetic algorithm optimization with multiprocessing pool.
+
+        With share_data enabled, bar history is loaded once in current
+        process and attached by all worker processes through shared memory.
+        """
         # Get optimization setting and target
         settings = optimization_setting.generate_setting_ga()
         target_name = optimization_setting.target_name
@@ -666,36 +921,57 @@ class BacktestingEngine:
                     individual[i] = paramlist[i]
             return individual,
 
+        # Load history data into shared memory once for all processes
+        shm = None
+        history_info = None
+
+        if share_data and self.mode == BacktestingMode.BAR:
+            shm, history_info = self.share_history_data()
+            if not shm:
+                return
+
         # Create ga object function
-        global ga_target_name
-        global ga_strategy_class
-        global ga_setting
-        global ga_vt_symbol
-        global ga_interval
-        global ga_start
-        global ga_rate
-        global ga_slippage
-        global ga_size
-        global ga_pricetick
-        global ga_capital
-        global ga_end
-        global ga_mode
-        global ga_inverse
-
-        ga_target_name = target_name
-        ga_strategy_class = self.strategy_class
-        ga_setting = settings[0]
-        ga_vt_symbol = self.vt_symbol
-        ga_interval = self.interval
-        ga_start = self.start
-        ga_rate = self.rate
-        ga_slippage = self.slippage
-        ga_size = self.size
-        ga_pricetick = self.pricetick
-        ga_capital = self.capital
-        ga_end = self.end
-        ga_mode = self.mode
-        ga_inverse = self.inverse
+        optimize_args = {
+            "target_name": target_name,
+            "strategy_class": self.strategy_class,
+            "vt_symbol": self.vt_symbol,
+            "interval": self.interval,
+            "start": self.start,
+            "rate": self.rate,
+            "slippage": self.slippage,
+            "size": self.size,
+            "pricetick": self.pricetick,
+            "capital": self.capital,
+            "end": self.end,
+            "mode": self.mode,
+            "inverse": self.inverse,
+            "columnar": self.columnar,
+            "history_info": history_info,
+            "streaming": self.streaming,
+            "prune_rules": optimization_setting.get_prune_rules()
+        }
+        evaluate = partial(ga_optimize, optimize_args=optimize_args)
+
+        # Evaluate each generation with process pool, and cache results
+        # by parameter values since the same individual appears repeatedly
+        ctx = multiprocessing.get_context("spawn")
+        best_value = ctx.Value("d", -np.inf)
+        pool = None
+
+        cache = {}
+
+        def map_with_cache(func: Callable, individuals: list) -> list:
+            """"""
+            keys = [tuple(individual) for individual in individuals]
+            new_keys = [key for key in dict.fromkeys(keys) if key not in cache]
+
+            if new_keys:
+                values = pool.map(func, new_keys)
+                cache.update(zip(new_keys, values))
+
+                update_best_value(best_value, max(value[0] for value in values))
+
+            return [cache[key] for key in keys]
 
         # Set up genetic algorithm
         toolbox = base.Toolbox()
@@ -703,7 +979,8 @@ class BacktestingEngine:
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
         toolbox.register("mate", tools.cxTwoPoint)
         toolbox.register("mutate", mutate_individual, indpb=1)
-        toolbox.register("evaluate", ga_optimize)
+        toolbox.register("evaluate", evaluate)
+        toolbox.register("map", map_with_cache)
         toolbox.register("select", tools.selNSGA2)
 
         total_size = len(settings)
@@ -725,10 +1002,6 @@ class BacktestingEngine:
         stats.register("min", np.min, axis=0)
         stats.register("max", np.max, axis=0)
 
-        # Multiprocessing is not supported yet.
-        # pool = multiprocessing.Pool(multiprocessing.cpu_count())
-        # toolbox.register("map", pool.map)
-
         # Run ga optimization
         self.output(f"参数优化空间：{total_size}")
         self.output(f"每代族群总数：{pop_size}")
@@ -737,32 +1010,50 @@ class BacktestingEngine:
         self.output(f"交叉概率：{cxpb:.0%}")
         self.output(f"突变概率：{mutpb:.0%}")
 
-        start = time()
-
-        algorithms.eaMuPlusLambda(
-            pop,
-            toolbox,
-            mu,
-            lambda_,
-            cxpb,
-            mutpb,
-            ngen,
-            stats,
-            halloffame=hof
-        )
+        try:
+            pool = ctx.Pool(
+                multiprocessing.cpu_count(),
+                initializer=init_optimize_process,
+                initargs=(best_value,)
+            )
 
-        end = time()
-        cost = int((end - start))
+            start = time()
+
+            algorithms.eaMuPlusLambda(
+                pop,
+                toolbox,
+                mu,
+                lambda_,
+                cxpb,
+                mutpb,
+                ngen,
+                stats,
+                halloffame=hof
+            )
+
+            end = time()
+            cost = int((end - start))
+
+            self.output(f"遗传算法优化完成，耗时{cost}秒")
 
-        self.output(f"遗传算法优化完成，耗时{cost}秒")
+            # Return result list
+            results = []
 
-        # Return result list
-        results = []
+            for parameter_values in hof:
+                setting = dict(parameter_values)
+                target_value = map_with_cache(evaluate, [parameter_values])[0][0]
+                results.append((setting, target_value, {}))
 
-        for parameter_values in hof:
-            setting = dict(parameter_values)
-            target_value = ga_optimize(parameter_values)[0]
-            results.append((setting, target_value, {}))
+            pool.close()
+            pool.join()
+        finally:
+            # Release pool and shared memory even if optimization failed
+            if pool:
+                pool.terminate()
+
+            if shm:
+                shm.close()
+                shm.unlink()
 
         return results
 
@@ -774,7 +1065,98 @@ class BacktestingEngine:
         if daily_result:
             daily_result.close_price = price
         else:
-            self.daily_results[d] = DailyResult(d, price)
+            if self.streaming:
+                self.close_daily_result()
+
+            daily_result = DailyResult(d, price)
+            self.daily_results[d] = daily_result
+            self.daily_result = daily_result
+
+        if self.pending_trades:
+            for trade in self.pending_trades:
+                daily_result.add_trade(trade)
+            self.pending_trades.clear()
+
+    def close_daily_result(self):
+        """
+        Calculate pnl of last daily result and update daily statistics.
+        """
+        if not self.daily_result:
+            return
+
+        daily_result = self.daily_result
+        self.daily_result = None
+
+        self.daily_statistics.update_result(daily_result)
+
+        if self.prune_rules:
+            self.check_prune_rules(daily_result.date)
+
+    def close_last_daily_result(self):
+        """
+        Close daily result of the last day after replay in streaming mode.
+        """
+        try:
+            self.close_daily_result()
+        except PruneException as e:
+            self.pruned = True
+            self.output(f"触发提前终止条件：{e}，回测终止")
+
+    def set_prune_rules(
+        self,
+        prune_rules: dict,
+        target_name: str = "",
+        best_value: Synchronized = None
+    ):
+        """
+        Set rules for aborting backtesting early, which requires streaming.
+
+        best_value is shared by optimization processes to hold current
+        best target value.
+        """
+        self.prune_rules = prune_rules
+        self.target_name = target_name
+        self.best_value = best_value
+
+        if prune_rules:
+            self.streaming = True
+
+    def check_prune_rules(self, current_date: date):
+        """
+        Raise PruneException if any prune rule is broken.
+        """
+        statistics = self.daily_statistics
+        rules = self.prune_rules
+
+        max_ddpercent = rules.get("max_ddpercent", None)
+        if max_ddpercent and statistics.max_ddpercent < -max_ddpercent:
+            raise PruneException(f"百分比最大回撤{statistics.max_ddpercent:.2f}%")
+
+        min_balance = rules.get("min_balance", None)
+        if min_balance is not None and statistics.balance < min_balance:
+            raise PruneException(f"资金{statistics.balance:,.2f}")
+
+        min_trade_count = rules.get("min_trade_count", None)
+        if min_trade_count:
+            count, check_date = min_trade_count
+            if (
+                current_date >= check_date
+                and statistics.total_trade_count < count
+            ):
+                raise PruneException(f"成交笔数{statistics.total_trade_count}")
+
+        if rules.get("target", False) and self.best_value:
+            value = getattr(statistics, self.target_name)
+            if value < self.best_value.value:
+                raise PruneException(f"目标{self.target_name}={value:,.2f}")
+
+    def add_trade(self, trade: TradeData):
+        """"""
+        self.trades[trade.vt_tradeid] = trade
+
+        # Trades are added into daily result after daily close is updated
+        if self.streaming:
+            self.pending_trades.append(trade)
 
     def new_bar(self, bar: BarData):
         """"""
@@ -813,7 +1195,15 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for order in list(self.active_limit_orders.values()):
+        matched_orders = self.limit_book.match_orders(
+            long_cross_price, short_cross_price, include_new=True
+        )
+
+        for _, order in matched_orders:
+            # Skip orders cancelled by callback of previous crossed order
+            if order.vt_orderid not in self.active_limit_orders:
+                continue
+
             # Push order update with status "not traded" (pending).
             if order.status == Status.SUBMITTING:
                 order.status = Status.NOTTRADED
@@ -841,6 +1231,7 @@ class BacktestingEngine:
             self.strategy.on_order(order)
 
             self.active_limit_orders.pop(order.vt_orderid)
+            self.limit_book.remove_order(order.vt_orderid)
 
             # Push trade update
             self.trade_count += 1
@@ -868,7 +1259,7 @@ class BacktestingEngine:
             self.strategy.pos += pos_change
             self.strategy.on_trade(trade)
 
-            self.trades[trade.vt_tradeid] = trade
+            self.add_trade(trade)
 
     def cross_stop_order(self):
         """
@@ -885,7 +1276,14 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for stop_order in list(self.active_stop_orders.values()):
+        matched_orders = self.stop_book.match_orders(
+            long_cross_price, short_cross_price
+        )
+
+        for _, stop_order in matched_orders:
+            if stop_order.stop_orderid not in self.active_stop_orders:
+                continue
+
             # Check whether stop order can be triggered.
             long_cross = (
                 stop_order.direction == Direction.LONG
@@ -942,7 +1340,7 @@ class BacktestingEngine:
                 gateway_name=self.gateway_name,
             )
 
-            self.trades[trade.vt_tradeid] = trade
+            self.add_trade(trade)
 
             # Update stop order.
             stop_order.vt_orderids.append(order.vt_orderid)
@@ -950,6 +1348,7 @@ class BacktestingEngine:
 
             if stop_order.stop_orderid in self.active_stop_orders:
                 self.active_stop_orders.pop(stop_order.stop_orderid)
+                self.stop_book.remove_order(stop_order.stop_orderid)
 
             # Push update to strategy.
             self.strategy.on_stop_order(stop_order)
@@ -1015,6 +1414,12 @@ class BacktestingEngine:
 
         self.active_stop_orders[stop_order.stop_orderid] = stop_order
         self.stop_orders[stop_order.stop_orderid] = stop_order
+        self.stop_book.add_order(
+            stop_order.stop_orderid,
+            stop_order,
+            direction == Direction.LONG,
+            price
+        )
 
         return stop_order.stop_orderid
 
@@ -1043,6 +1448,12 @@ class BacktestingEngine:
 
         self.active_limit_orders[order.vt_orderid] = order
         self.limit_orders[order.vt_orderid] = order
+        self.limit_book.add_order(
+            order.vt_orderid,
+            order,
+            direction == Direction.LONG,
+            price
+        )
 
         return order.vt_orderid
 
@@ -1060,6 +1471,7 @@ class BacktestingEngine:
         if vt_orderid not in self.active_stop_orders:
             return
         stop_order = self.active_stop_orders.pop(vt_orderid)
+        self.stop_book.remove_order(vt_orderid)
 
         stop_order.status = StopOrderStatus.CANCELLED
         self.strategy.on_stop_order(stop_order)
@@ -1069,6 +1481,7 @@ class BacktestingEngine:
         if vt_orderid not in self.active_limit_orders:
             return
         order = self.active_limit_orders.pop(vt_orderid)
+        self.limit_book.remove_order(vt_orderid)
 
         order.status = Status.CANCELLED
         self.strategy.on_order(order)
@@ -1235,6 +1648,151 @@ class DailyResult:
         self.net_pnl = self.total_pnl - self.commission - self.slippage
 
 
+class DailyStatistics:
+    """
+    Running statistics updated with each closed daily result.
+    """
+
+    def __init__(
+        self,
+        capital: float,
+        size: float,
+        rate: float,
+        slippage: float,
+        inverse: bool
+    ):
+        """"""
+        self.capital = capital
+        self.size = size
+        self.rate = rate
+        self.slippage = slippage
+        self.inverse = inverse
+
+        self.pre_close = 0
+        self.end_pos = 0
+
+        self.start_date = None
+        self.end_date = None
+        self.total_days = 0
+        self.profit_days = 0
+        self.loss_days = 0
+
+        self.total_net_pnl = 0
+        self.total_commission = 0
+        self.total_slippage = 0
+        self.total_turnover = 0
+        self.total_trade_count = 0
+
+        self.balance = capital
+        self.highlevel = 0
+        self.highlevel_date = None
+        self.drawdown = 0
+        self.ddpercent = 0
+        self.max_drawdown = 0
+        self.max_ddpercent = 0
+        self.max_drawdown_duration = 0
+
+        # Mean and sum of squared deviations of daily log return
+        self.return_mean = 0
+        self.return_m2 = 0
+
+    def update_result(self, daily_result: DailyResult):
+        """"""
+        daily_result.calculate_pnl(
+            self.pre_close,
+            self.end_pos,
+            self.size,
+            self.rate,
+            self.slippage,
+            self.inverse
+        )
+
+        self.pre_close = daily_result.close_price
+        self.end_pos = daily_result.end_pos
+
+        d = daily_result.date
+        net_pnl = daily_result.net_pnl
+
+        if not self.start_date:
+            self.start_date = d
+        self.end_date = d
+
+        self.total_days += 1
+        if net_pnl > 0:
+            self.profit_days += 1
+        elif net_pnl < 0:
+            self.loss_days += 1
+
+        self.total_net_pnl += net_pnl
+        self.total_commission += daily_result.commission
+        self.total_slippage += daily_result.slippage
+        self.total_turnover += daily_result.turnover
+        self.total_trade_count += daily_result.trade_count
+
+        pre_balance = self.balance
+        self.balance += net_pnl
+
+        # Return of first day and of balance below 0 is regarded as 0
+        daily_return = 0
+        if self.total_days > 1 and pre_balance:
+            x = self.balance / pre_balance
+            if x > 0:
+                daily_return = np.log(x)
+
+        delta = daily_return - self.return_mean
+        self.return_mean += delta / self.total_days
+        self.return_m2 += delta * (daily_return - self.return_mean)
+
+        if self.total_days == 1 or self.balance > self.highlevel:
+            self.highlevel = self.balance
+            self.highlevel_date = d
+
+        self.drawdown = self.balance - self.highlevel
+        self.ddpercent = self.drawdown / self.highlevel * 100
+
+        if self.drawdown < self.max_drawdown:
+            self.max_drawdown = self.drawdown
+            self.max_drawdown_duration = (d - self.highlevel_date).days
+        self.max_ddpercent = min(self.max_ddpercent, self.ddpercent)
+
+    def get_return_std(self) -> float:
+        """
+        Get sample standard deviation of daily log return.
+        """
+        if self.total_days < 2:
+            return 0
+        return np.sqrt(self.return_m2 / (self.total_days - 1))
+
+
+class PruneException(Exception):
+    """
+    Raised when backtesting breaks any prune rule of optimization.
+    """
+    pass
+
+
+def init_optimize_process(best_value: Synchronized):
+    """
+    Initializer of optimization process for sharing best target value.
+    """
+    global shared_best_value
+    shared_best_value = best_value
+
+
+def update_best_value(best_value: Synchronized, value: float):
+    """
+    Update best target value shared by optimization processes.
+    """
+    with best_value.get_lock():
+        if value > best_value.value:
+            best_value.value = value
+
+
+def update_best_value_by_result(best_value: Synchronized, result: tuple):
+    """"""
+    update_best_value(best_value, result[1])
+
+
 def optimize(
     target_name: str,
     strategy_class: CtaTemplate,
@@ -1249,7 +1807,11 @@ def optimize(
     capital: int,
     end: datetime,
     mode: BacktestingMode,
-    inverse: bool
+    inverse: bool,
+    columnar: bool = False,
+    history_info: dict = None,
+    streaming: bool = False,
+    prune_rules: dict = None
 ):
     """
     Function for running in multiprocessing.pool
@@ -1267,50 +1829,66 @@ def optimize(
         capital=capital,
         end=end,
         mode=mode,
-        inverse=inverse
+        inverse=inverse,
+        columnar=columnar,
+        streaming=streaming
     )
 
+    if prune_rules:
+        engine.set_prune_rules(prune_rules, target_name, shared_best_value)
+
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+
+    if history_info:
+        engine.history_data = attach_bar_array(history_info)
+    else:
+        engine.load_data()
+
     engine.run_backtesting()
-    engine.calculate_result()
+
+    # DataFrame is not needed in streaming mode, statistics are updated
+    # during replay already
+    if engine.streaming:
+        engine.close_last_daily_result()
+    else:
+        engine.calculate_result()
     statistics = engine.calculate_statistics(output=False)
 
-    target_value = statistics[target_name]
+    # Pruned result is based on partial history, so never rank it as best
+    if engine.pruned:
+        target_value = -np.inf
+    else:
+        target_value = statistics[target_name]
+
     return (str(setting), target_value, statistics)
 
 
-@lru_cache(maxsize=1000000)
-def _ga_optimize(parameter_values: tuple):
-    """"""
+def ga_optimize(parameter_values: tuple, optimize_args: dict) -> tuple:
+    """
+    Function for evaluating fitness of individual in multiprocessing.pool
+    """
     setting = dict(parameter_values)
 
-    result = optimize(
-        ga_target_name,
-        ga_strategy_class,
-        setting,
-        ga_vt_symbol,
-        ga_interval,
-        ga_start,
-        ga_rate,
-        ga_slippage,
-        ga_size,
-        ga_pricetick,
-        ga_capital,
-        ga_end,
-        ga_mode,
-        ga_inverse
-    )
+    result = optimize(setting=setting, **optimize_args)
     return (result[1],)
 
 
-def ga_optimize(parameter_values: list):
+@lru_cache(maxsize=999)
+def load_bar_data(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    start: datetime,
+    end: datetime
+):
     """"""
-    return _ga_optimize(tuple(parameter_values))
+    return get_backtesting_source().load_bar_data(
+        symbol, exchange, interval, start, end
+    )
 
 
 @lru_cache(maxsize=999)
-def load_bar_data(
+def load_bar_array(
     symbol: str,
     exchange: Exchange,
     interval: Interval,
@@ -1318,11 +1896,66 @@ def load_bar_data(
     end: datetime
 ):
     """"""
-    return database_manager.load_bar_data(
+    return get_backtesting_source().load_bar_array(
         symbol, exchange, interval, start, end
     )
 
 
+def share_bar_array(bars: BarArray) -> Tuple[SharedMemory, dict]:
+    """
+    Copy bar array into a new shared memory block.
+
+    Return the shared memory object, which must be kept alive and unlinked
+    by the caller, together with info for attaching in other processes.
+    """
+    shm = SharedMemory(create=True, size=bars.data.nbytes)
+
+    data = np.ndarray(bars.data.shape, dtype=BAR_DTYPE, buffer=shm.buf)
+    data[:] = bars.data
+
+    history_info = {
+        "name": shm.name,
+        "length": len(bars),
+        "symbol": bars.symbol,
+        "exchange": bars.exchange,
+        "interval": bars.interval,
+        "tz": bars.tz,
+        "gateway_name": bars.gateway_name
+    }
+    return shm, history_info
+
+
+def attach_bar_array(history_info: dict) -> BarArray:
+    """
+    Attach bar array in shared memory without copying data.
+
+    Shared memory is attached only once in each process, and kept open
+    until the process exits.
+    """
+    name = history_info["name"]
+
+    if name not in attached_memories:
+        attached_memories[name] = SharedMemory(name=name)
+
+    shm = attached_memories[name]
+
+    data = np.ndarray(
+        (history_info["length"],),
+        dtype=BAR_DTYPE,
+        buffer=shm.buf
+    )
+    data.flags.writeable = False
+
+    return BarArray(
+        data,
+        history_info["symbol"],
+        history_info["exchange"],
+        history_info["interval"],
+        history_info["tz"],
+        history_info["gateway_name"]
+    )
+
+
 @lru_cache(maxsize=999)
 def load_tick_data(
     symbol: str,
@@ -1331,22 +1964,13 @@ def load_tick_data(
     end: datetime
 ):
     """"""
-    return database_manager.load_tick_data(
+    return get_backtesting_source().load_tick_data(
         symbol, exchange, start, end
     )
 
 
-# GA related global value
-ga_end = None
-ga_mode = None
-ga_target_name = None
-ga_strategy_class = None
-ga_setting = None
-ga_vt_symbol = None
-ga_interval = None
-ga_start = None
-ga_rate = None
-ga_slippage = None
-ga_size = None
-ga_pricetick = None
-ga_capital = None
+# Shared memory attached by optimization process
+attached_memories: Dict[str, SharedMemory] = {}
+
+# Best target value shared by optimization processes
+shared_best_value: Synchronized = None
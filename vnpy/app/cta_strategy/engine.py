@@ -3,9 +3,10 @@
 import importlib
 import os
 import traceback
+from bisect import bisect_left, bisect_right, insort
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, List
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 from copy import copy
@@ -64,6 +65,63 @@ STOP_STATUS_MAP = {
 }
 
 
+class StopOrderIndex:
+    """
+    Stop orders of one vt_symbol, sorted by trigger price.
+
+    Long orders trigger when last price rises to or above stop price,
+    short orders trigger when last price falls to or below stop price,
+    so only a prefix of long list and a suffix of short list need to
+    be visited on each tick.
+    """
+
+    def __init__(self):
+        """"""
+        self.long_orders: list = []     # (price, count, stop_order)
+        self.short_orders: list = []    # (price, count, stop_order)
+
+    def get_orders(self, direction: Direction) -> list:
+        """"""
+        if direction == Direction.LONG:
+            return self.long_orders
+        else:
+            return self.short_orders
+
+    def add_stop_order(self, stop_order: StopOrder, count: int):
+        """"""
+        orders = self.get_orders(stop_order.direction)
+        insort(orders, (stop_order.price, count, stop_order))
+
+    def remove_stop_order(self, stop_order: StopOrder):
+        """"""
+        orders = self.get_orders(stop_order.direction)
+
+        ix = bisect_left(orders, (stop_order.price,))
+        while ix < len(orders) and orders[ix][0] == stop_order.price:
+            if orders[ix][2] is stop_order:
+                orders.pop(ix)
+                return
+            ix += 1
+
+    def get_triggered_orders(self, price: float) -> List[StopOrder]:
+        """
+        Return triggered stop orders in the order they were sent.
+        """
+        long_ix = bisect_right(self.long_orders, (price, float("inf")))
+        short_ix = bisect_left(self.short_orders, (price,))
+
+        triggered = self.long_orders[:long_ix] + self.short_orders[short_ix:]
+        if not triggered:
+            return []
+
+        triggered.sort(key=lambda item: item[1])
+        return [item[2] for item in triggered]
+
+    def __len__(self):
+        """"""
+        return len(self.long_orders) + len(self.short_orders)
+
+
 class CtaEngine(BaseEngine):
     """"""
 
@@ -91,6 +149,7 @@ class CtaEngine(BaseEngine):
 
         self.stop_order_count = 0   # for generating stop_orderid
         self.stop_orders = {}       # stop_orderid: stop_order
+        self.stop_order_indexes = {}    # vt_symbol: stop_order_index
 
         self.init_executor = ThreadPoolExecutor(max_workers=1)
 
@@ -230,63 +289,61 @@ class CtaEngine(BaseEngine):
 
     def check_stop_order(self, tick: TickData):
         """"""
-        for stop_order in list(self.stop_orders.values()):
-            if stop_order.vt_symbol != tick.vt_symbol:
+        index = self.stop_order_indexes.get(tick.vt_symbol, None)
+        if not index:
+            return
+
+        for stop_order in index.get_triggered_orders(tick.last_price):
+            # Skip orders cancelled by callback of previous triggered order
+            if stop_order.stop_orderid not in self.stop_orders:
                 continue
 
-            long_triggered = (
-                stop_order.direction == Direction.LONG and tick.last_price >= stop_order.price
-            )
-            short_triggered = (
-                stop_order.direction == Direction.SHORT and tick.last_price <= stop_order.price
-            )
+            strategy = self.strategies[stop_order.strategy_name]
 
-            if long_triggered or short_triggered:
-                strategy = self.strategies[stop_order.strategy_name]
-
-                # To get excuted immediately after stop order is
-                # triggered, use limit price if available, otherwise
-                # use ask_price_5 or bid_price_5
-                if stop_order.direction == Direction.LONG:
-                    if tick.limit_up:
-                        price = tick.limit_up
-                    else:
-                        price = tick.ask_price_5
+            # To get excuted immediately after stop order is
+            # triggered, use limit price if available, otherwise
+            # use ask_price_5 or bid_price_5
+            if stop_order.direction == Direction.LONG:
+                if tick.limit_up:
+                    price = tick.limit_up
                 else:
-                    if tick.limit_down:
-                        price = tick.limit_down
-                    else:
-                        price = tick.bid_price_5
-
-                contract = self.main_engine.get_contract(stop_order.vt_symbol)
-
-                vt_orderids = self.send_limit_order(
-                    strategy,
-                    contract,
-                    stop_order.direction,
-                    stop_order.offset,
-                    price,
-                    stop_order.volume,
-                    stop_order.lock
-                )
+                    price = tick.ask_price_5
+            else:
+                if tick.limit_down:
+                    price = tick.limit_down
+                else:
+                    price = tick.bid_price_5
+
+            contract = self.main_engine.get_contract(stop_order.vt_symbol)
+
+            vt_orderids = self.send_limit_order(
+                strategy,
+                contract,
+                stop_order.direction,
+                stop_order.offset,
+                price,
+                stop_order.volume,
+                stop_order.lock
+            )
 
-                # Update stop order status if placed successfully
-                if vt_orderids:
-                    # Remove from relation map.
-                    self.stop_orders.pop(stop_order.stop_orderid)
+            # Update stop order status if placed successfully
+            if vt_orderids:
+                # Remove from relation map.
+                self.stop_orders.pop(stop_order.stop_orderid)
+                index.remove_stop_order(stop_order)
 
-                    strategy_vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
-                    if stop_order.stop_orderid in strategy_vt_orderids:
-                        strategy_vt_orderids.remove(stop_order.stop_orderid)
+                strategy_vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
+                if stop_order.stop_orderid in strategy_vt_orderids:
+                    strategy_vt_orderids.remove(stop_order.stop_orderid)
 
-                    # Change stop order status to cancelled and update to strategy.
-                    stop_order.status = StopOrderStatus.TRIGGERED
-                    stop_order.vt_orderids = vt_orderids
+                # Change stop order status to cancelled and update to strategy.
+                stop_order.status = StopOrderStatus.TRIGGERED
+                stop_order.vt_orderids = vt_orderids
 
-                    self.call_strategy_func(
-                        strategy, strategy.on_stop_order, stop_order
-                    )
-                    self.put_stop_order_event(stop_order)
+                self.call_strategy_func(
+                    strategy, strategy.on_stop_order, stop_order
+                )
+                self.put_stop_order_event(stop_order)
 
     def send_server_order(
         self,
@@ -417,6 +474,12 @@ class CtaEngine(BaseEngine):
 
         self.stop_orders[stop_orderid] = stop_order
 
+        index = self.stop_order_indexes.get(stop_order.vt_symbol, None)
+        if not index:
+            index = StopOrderIndex()
+            self.stop_order_indexes[stop_order.vt_symbol] = index
+        index.add_stop_order(stop_order, self.stop_order_count)
+
         vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
         vt_orderids.add(stop_orderid)
 
@@ -449,6 +512,9 @@ class CtaEngine(BaseEngine):
         # Remove from relation map.
         self.stop_orders.pop(stop_orderid)
 
+        index = self.stop_order_indexes[stop_order.vt_symbol]
+        index.remove_stop_order(stop_order)
+
         vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
         if stop_orderid in vt_orderids:
             vt_orderids.remove(stop_orderid)
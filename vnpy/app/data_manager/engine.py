@@ -1,19 +1,100 @@
 import csv
-from datetime import datetime
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable, List, Dict, Optional, Tuple
+
+import pandas as pd
 
 from vnpy.trader.engine import BaseEngine, MainEngine, EventEngine
 from vnpy.trader.constant import Interval, Exchange
 from vnpy.trader.object import BarData, HistoryRequest
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import DB_TZ
 from vnpy.trader.rqdata import rqdata_client
+from vnpy.trader.utility import load_json, save_json
 
 
 APP_NAME = "DataManager"
 
+# Rows of each chunk when importing/exporting csv file
+CSV_CHUNK_SIZE = 100_000
+
+# Number of symbols queried at the same time when syncing history data
+SYNC_WORKERS = 4
+
+# Range within this delay before now is regarded as covered only up to
+# the newest bar received, since bars may not be finished yet
+SYNC_DELAY = timedelta(days=1)
+
+# RQData client is not thread safe, queries from sync workers are serialized
+rqdata_lock = Lock()
+
+
+def merge_ranges(ranges: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """
+    Merge overlapping datetime ranges into sorted disjoint ranges.
+    """
+    merged = []
+
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            last_start, last_end = merged[-1]
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def get_missing_ranges(
+    ranges: List[Tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Get parts of start/end not covered by sorted disjoint ranges.
+    """
+    missing = []
+
+    for range_start, range_end in ranges:
+        if range_end < start:
+            continue
+        if range_start > end:
+            break
+
+        if range_start > start:
+            missing.append((start, range_start))
+        start = max(start, range_end)
+
+    if start < end:
+        missing.append((start, end))
+
+    return missing
+
+
+class NullFilter:
+    """
+    File wrapper removing null characters, which exist in csv files
+    from some data vendors.
+    """
+
+    def __init__(self, f):
+        """"""
+        self.f = f
+
+    def read(self, size: int = -1) -> str:
+        """"""
+        return self.f.read(size).replace("\0", "")
+
+    def __iter__(self):
+        """"""
+        return (line.replace("\0", "") for line in self.f)
+
 
 class ManagerEngine(BaseEngine):
     """"""
+    coverage_filename = "data_manager_coverage.json"
 
     def __init__(
         self,
@@ -23,6 +104,76 @@ class ManagerEngine(BaseEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
+        # Datetime ranges already queried from data source of each
+        # symbol.exchange.interval
+        self.coverages: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        self.coverage_lock: Lock = Lock()
+
+        self.load_coverage()
+
+    def load_coverage(self) -> None:
+        """"""
+        setting = load_json(self.coverage_filename)
+
+        for key, ranges in setting.items():
+            self.coverages[key] = [
+                (datetime.fromisoformat(start), datetime.fromisoformat(end))
+                for start, end in ranges
+            ]
+
+    def save_coverage(self) -> None:
+        """"""
+        with self.coverage_lock:
+            setting = {
+                key: [(start.isoformat(), end.isoformat()) for start, end in ranges]
+                for key, ranges in self.coverages.items()
+            }
+
+        save_json(self.coverage_filename, setting)
+
+    def get_coverage(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Get ranges covered in database. For data not synced before, the
+        range from oldest to newest bar in database is regarded as covered.
+        """
+        key = f"{symbol}.{exchange.value}.{interval.value}"
+
+        with self.coverage_lock:
+            ranges = self.coverages.get(key, None)
+        if ranges is not None:
+            return ranges
+
+        ranges = []
+
+        oldest_bar = database_manager.get_oldest_bar_data(symbol, exchange, interval)
+        newest_bar = database_manager.get_newest_bar_data(symbol, exchange, interval)
+        if oldest_bar and newest_bar:
+            ranges.append((oldest_bar.datetime, newest_bar.datetime))
+
+        with self.coverage_lock:
+            self.coverages[key] = ranges
+        return ranges
+
+    def add_coverage(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> None:
+        """"""
+        key = f"{symbol}.{exchange.value}.{interval.value}"
+
+        with self.coverage_lock:
+            ranges = self.coverages.get(key, [])
+            self.coverages[key] = merge_ranges(ranges + [(start, end)])
+
     def import_data_from_csv(
         self,
         file_path: str,
@@ -38,49 +189,100 @@ class ManagerEngine(BaseEngine):
         open_interest_head: str,
         datetime_format: str
     ) -> Tuple:
-        """"""
-        with open(file_path, "rt") as f:
-            buf = [line.replace("\0", "") for line in f]
-
-        reader = csv.DictReader(buf, delimiter=",")
+        """
+        Parse csv file chunk by chunk, and save each chunk into database
+        so that memory usage does not grow with file size.
+        """
+        heads = {
+            datetime_head,
+            open_head,
+            high_head,
+            low_head,
+            close_head,
+            volume_head,
+            open_interest_head
+        }
 
-        bars = []
         start = None
+        end = None
         count = 0
 
-        for item in reader:
-            if datetime_format:
-                dt = datetime.strptime(item[datetime_head], datetime_format)
-            else:
-                dt = datetime.fromisoformat(item[datetime_head])
-
-            open_interest = item.get(open_interest_head, 0)
-
-            bar = BarData(
-                symbol=symbol,
-                exchange=exchange,
-                datetime=dt,
-                interval=interval,
-                volume=float(item[volume_head]),
-                open_price=float(item[open_head]),
-                high_price=float(item[high_head]),
-                low_price=float(item[low_head]),
-                close_price=float(item[close_head]),
-                open_interest=float(open_interest),
-                gateway_name="DB",
-            )
-
-            bars.append(bar)
+        # Initialize coverage from data already in database before import
+        self.get_coverage(symbol, exchange, interval)
 
-            # do some statistics
-            count += 1
-            if not start:
-                start = bar.datetime
+        with open(file_path, "rt") as f:
+            reader = pd.read_csv(
+                NullFilter(f),
+                usecols=lambda name: name in heads,
+                dtype={datetime_head: str},
+                float_precision="round_trip",
+                chunksize=CSV_CHUNK_SIZE
+            )
 
-        # insert into database
-        database_manager.save_bar_data(bars)
+            for df in reader:
+                if datetime_format:
+                    datetimes = pd.to_datetime(df[datetime_head], format=datetime_format)
+                else:
+                    datetimes = pd.to_datetime(df[datetime_head])
+
+                if open_interest_head in df:
+                    open_interests = df[open_interest_head].astype(float).tolist()
+                else:
+                    open_interests = [0] * len(df)
+
+                columns = zip(
+                    datetimes.dt.to_pydatetime().tolist(),
+                    df[open_head].astype(float).tolist(),
+                    df[high_head].astype(float).tolist(),
+                    df[low_head].astype(float).tolist(),
+                    df[close_head].astype(float).tolist(),
+                    df[volume_head].astype(float).tolist(),
+                    open_interests
+                )
+
+                bars = [
+                    BarData(
+                        symbol=symbol,
+                        exchange=exchange,
+                        datetime=dt,
+                        interval=interval,
+                        volume=volume,
+                        open_price=open_price,
+                        high_price=high_price,
+                        low_price=low_price,
+                        close_price=close_price,
+                        open_interest=open_interest,
+                        gateway_name="DB",
+                    )
+                    for (
+                        dt,
+                        open_price,
+                        high_price,
+                        low_price,
+                        close_price,
+                        volume,
+                        open_interest
+                    ) in columns
+                ]
+
+                if not bars:
+                    continue
+
+                # insert into database
+                database_manager.save_bar_data(bars)
+
+                # do some statistics
+                count += len(bars)
+                if not start:
+                    start = bars[0].datetime
+                end = bars[-1].datetime
+
+        if count:
+            coverage_start = start if start.tzinfo else DB_TZ.localize(start)
+            coverage_end = end if end.tzinfo else DB_TZ.localize(end)
+            self.add_coverage(symbol, exchange, interval, coverage_start, coverage_end)
+            self.save_coverage()
 
-        end = bar.datetime
         return start, end, count
 
     def output_data_to_csv(
@@ -92,9 +294,9 @@ class ManagerEngine(BaseEngine):
         start: datetime,
         end: datetime
     ) -> bool:
-        """"""
-        bars = self.load_bar_data(symbol, exchange, interval, start, end)
-
+        """
+        Load bar data chunk by chunk from database and write into csv file.
+        """
         fieldnames = [
             "symbol",
             "exchange",
@@ -109,22 +311,32 @@ class ManagerEngine(BaseEngine):
 
         try:
             with open(file_path, "w") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator="\n")
-                writer.writeheader()
-
-                for bar in bars:
-                    d = {
-                        "symbol": bar.symbol,
-                        "exchange": bar.exchange.value,
-                        "datetime": bar.datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                        "open": bar.open_price,
-                        "high": bar.high_price,
-                        "low": bar.low_price,
-                        "close": bar.close_price,
-                        "volume": bar.volume,
-                        "open_interest": bar.open_interest,
-                    }
-                    writer.writerow(d)
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(fieldnames)
+
+                for bars in database_manager.iter_bar_data(
+                    symbol,
+                    exchange,
+                    interval,
+                    start,
+                    end,
+                    CSV_CHUNK_SIZE
+                ):
+                    rows = [
+                        (
+                            bar.symbol,
+                            bar.exchange.value,
+                            bar.datetime.strftime("%Y-%m-%d %H:%M:%S"),
+                            bar.open_price,
+                            bar.high_price,
+                            bar.low_price,
+                            bar.close_price,
+                            bar.volume,
+                            bar.open_interest
+                        )
+                        for bar in bars
+                    ]
+                    writer.writerows(rows)
 
             return True
         except PermissionError:
@@ -179,24 +391,31 @@ class ManagerEngine(BaseEngine):
             interval
         )
 
+        key = f"{symbol}.{exchange.value}.{interval.value}"
+        with self.coverage_lock:
+            self.coverages.pop(key, None)
+        self.save_coverage()
+
         return count
 
-    def download_bar_data(
+    def query_bar_data(
         self,
         symbol: str,
         exchange: Exchange,
-        interval: str,
-        start: datetime
-    ) -> int:
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Optional[List[BarData]]:
         """
-        Query bar data from RQData.
+        Query bar data from gateway if history data provided, otherwise
+        from RQData. Return None if query failed.
         """
         req = HistoryRequest(
             symbol=symbol,
             exchange=exchange,
-            interval=Interval(interval),
+            interval=interval,
             start=start,
-            end=datetime.now()
+            end=end
         )
 
         vt_symbol = f"{symbol}.{exchange.value}"
@@ -209,16 +428,113 @@ class ManagerEngine(BaseEngine):
             )
         # Otherwise use RQData to query data
         else:
-            if not rqdata_client.inited:
-                rqdata_client.init()
+            with rqdata_lock:
+                data = rqdata_client.query_history(req)
 
-            data = rqdata_client.query_history(req)
+        return data
 
-        if data:
-            database_manager.save_bar_data(data)
-            return(len(data))
+    def query_missing_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        missing: List[Tuple[datetime, datetime]]
+    ) -> List[Tuple[datetime, datetime, Optional[List[BarData]]]]:
+        """
+        Query each missing range of one symbol, run in worker thread.
+        """
+        return [
+            (start, end, self.query_bar_data(symbol, exchange, interval, start, end))
+            for start, end in missing
+        ]
 
-        return 0
+    def sync_bar_data(
+        self,
+        requests: List[Tuple[str, Exchange, Interval, datetime]],
+        max_workers: int = SYNC_WORKERS,
+        callback: Callable[[int, int], bool] = None
+    ) -> int:
+        """
+        Download bar data of (symbol, exchange, interval, start) requests
+        up to now, skipping ranges already covered in database.
+
+        Symbols are queried concurrently in worker threads, while data is
+        saved into database in caller thread. Callback is called with
+        finished and total count of requests after each one, and returning
+        False from callback cancels requests not started yet.
+        """
+        if not rqdata_client.inited:
+            rqdata_client.init()
+
+        end = datetime.now(DB_TZ)
+        delay_start = end - SYNC_DELAY
+        total = len(requests)
+        finished = 0
+        count = 0
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures = {}
+
+            for symbol, exchange, interval, start in requests:
+                if not start.tzinfo:
+                    start = DB_TZ.localize(start)
+
+                ranges = self.get_coverage(symbol, exchange, interval)
+                missing = get_missing_ranges(ranges, start, end)
+
+                future = executor.submit(
+                    self.query_missing_data, symbol, exchange, interval, missing
+                )
+                futures[future] = (symbol, exchange, interval)
+
+            for future in as_completed(futures):
+                symbol, exchange, interval = futures[future]
+
+                try:
+                    results = future.result()
+                except Exception as e:
+                    self.main_engine.write_log(
+                        f"{symbol}.{exchange.value}历史数据下载失败：{e}", APP_NAME
+                    )
+                    results = []
+
+                for range_start, range_end, data in results:
+                    if data is None:
+                        continue
+
+                    if data:
+                        database_manager.save_bar_data(data)
+                        count += len(data)
+
+                    # Recent range may be updated later, only covered
+                    # up to the newest bar received
+                    if range_end > delay_start:
+                        if not data:
+                            continue
+                        range_end = min(range_end, data[-1].datetime)
+
+                    self.add_coverage(symbol, exchange, interval, range_start, range_end)
+
+                finished += 1
+                if callback and callback(finished, total) is False:
+                    for f in futures:
+                        f.cancel()
+                    break
+
+        self.save_coverage()
+        return count
+
+    def download_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: str,
+        start: datetime
+    ) -> int:
+        """
+        Query bar data not in database from gateway or RQData.
+        """
+        return self.sync_bar_data([(symbol, exchange, Interval(interval), start)])
 
     def download_tick_data(
         self,
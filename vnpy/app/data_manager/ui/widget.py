@@ -353,8 +353,6 @@ class ManagerWidget(QtWidgets.QWidget):
     def update_data(self) -> None:
         """"""
         data = self.engine.get_bar_data_available()
-        total = len(data)
-        count = 0
 
         dialog = QtWidgets.QProgressDialog(
             "历史数据更新中",
@@ -366,19 +364,23 @@ class ManagerWidget(QtWidgets.QWidget):
         dialog.setWindowModality(QtCore.Qt.WindowModal)
         dialog.setValue(0)
 
-        for d in data:
-            if dialog.wasCanceled():
-                break
-
-            self.engine.download_bar_data(
+        requests = [
+            (
                 d["symbol"],
                 Exchange(d["exchange"]),
                 Interval(d["interval"]),
-                d["end"]
+                d["start"]
             )
-            count += 1
+            for d in data
+        ]
+
+        def update_progress(count: int, total: int) -> bool:
+            """"""
             progress = int(round(count / total * 100, 0))
             dialog.setValue(progress)
+            return not dialog.wasCanceled()
+
+        self.engine.sync_bar_data(requests, callback=update_progress)
 
         dialog.close()
 
@@ -2,8 +2,9 @@
 
 import sys
 from threading import Thread
-from queue import Queue, Empty
+from queue import Queue, Empty, Full
 from copy import copy
+from time import time
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -16,7 +17,9 @@ from vnpy.trader.object import (
 )
 from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT
 from vnpy.trader.utility import load_json, save_json, BarGenerator
+from vnpy.trader.setting import SETTINGS
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.datafile import datafile_store
 from vnpy.app.spread_trading.base import EVENT_SPREAD_DATA, SpreadData
 
 
@@ -35,7 +38,6 @@ class RecorderEngine(BaseEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
-        self.queue = Queue()
         self.thread = Thread(target=self.run)
         self.active = False
 
@@ -43,7 +45,22 @@ class RecorderEngine(BaseEngine):
         self.bar_recordings = {}
         self.bar_generators = {}
 
+        # Flush policy of batch saving
+        self.batch_size = 1000
+        self.flush_interval = 500       # Unit: millisecond
+        self.queue_size = 100000
+        self.put_timeout = 100          # Unit: millisecond
+
+        # Backpressure statistics of task queue
+        self.max_queue_size = 0
+        self.full_count = 0
+        self.drop_count = 0
+        self.flush_count = 0
+        self.saved_count = 0
+        self.dropping = False
+
         self.load_setting()
+        self.queue = Queue(maxsize=self.queue_size)
         self.register_event()
         self.start()
         self.put_event()
@@ -54,11 +71,20 @@ class RecorderEngine(BaseEngine):
         self.tick_recordings = setting.get("tick", {})
         self.bar_recordings = setting.get("bar", {})
 
+        self.batch_size = setting.get("batch_size", self.batch_size)
+        self.flush_interval = setting.get("flush_interval", self.flush_interval)
+        self.queue_size = setting.get("queue_size", self.queue_size)
+        self.put_timeout = setting.get("put_timeout", self.put_timeout)
+
     def save_setting(self):
         """"""
         setting = {
             "tick": self.tick_recordings,
-            "bar": self.bar_recordings
+            "bar": self.bar_recordings,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "queue_size": self.queue_size,
+            "put_timeout": self.put_timeout
         }
         save_json(self.setting_filename, setting)
 
@@ -67,12 +93,8 @@ class RecorderEngine(BaseEngine):
         while self.active:
             try:
                 task = self.queue.get(timeout=1)
-                task_type, data = task
-
-                if task_type == "tick":
-                    database_manager.save_tick_data([data])
-                elif task_type == "bar":
-                    database_manager.save_bar_data([data])
+                tasks = self.collect_tasks(task)
+                self.save_tasks(tasks)
 
             except Empty:
                 continue
@@ -83,6 +105,116 @@ class RecorderEngine(BaseEngine):
                 info = sys.exc_info()
                 event = Event(EVENT_RECORDER_EXCEPTION, info)
                 self.event_engine.put(event)
+                return
+
+        # Save tasks left in queue before exit
+        tasks = []
+        while not self.queue.empty():
+            tasks.append(self.queue.get())
+        self.save_tasks(tasks)
+
+    def collect_tasks(self, task: tuple) -> list:
+        """
+        Collect tasks until batch size reached or flush interval passed.
+        """
+        tasks = [task]
+        deadline = time() + self.flush_interval / 1000
+
+        while len(tasks) < self.batch_size:
+            timeout = deadline - time()
+            if timeout <= 0:
+                break
+
+            try:
+                task = self.queue.get(timeout=timeout)
+                tasks.append(task)
+            except Empty:
+                break
+
+        return tasks
+
+    def save_tasks(self, tasks: list):
+        """
+        Save tasks grouped by type, with one database call for each type.
+        """
+        if not tasks:
+            return
+
+        ticks = []
+        bars = []
+
+        for task_type, data in tasks:
+            if task_type == "tick":
+                ticks.append(data)
+            elif task_type == "bar":
+                bars.append(data)
+
+        if ticks:
+            database_manager.save_tick_data(ticks)
+
+        if bars:
+            database_manager.save_bar_data(bars)
+
+        if SETTINGS["datafile.recording"]:
+            datafile_store.save_tick_data(ticks)
+            datafile_store.save_bar_data(bars)
+
+        self.flush_count += 1
+        self.saved_count += len(tasks)
+
+    def put_task(self, task: tuple):
+        """
+        Put task into queue. If the queue is full, wait at most put_timeout
+        for saving thread to catch up, then drop tasks instead of blocking
+        event engine thread until queue has room again.
+        """
+        try:
+            self.queue.put_nowait(task)
+        except Full:
+            self.full_count += 1
+
+            # Do not wait again until queue recovers from overflow
+            deadline = time()
+            if not self.dropping:
+                deadline += self.put_timeout / 1000
+
+            while True:
+                # Drop the task if saving thread has already stopped
+                timeout = min(deadline - time(), 0.01)
+                if not self.active or timeout <= 0:
+                    self.drop_count += 1
+
+                    if not self.dropping:
+                        self.dropping = True
+                        self.write_log(
+                            f"数据记录队列已满，开始丢弃数据，累计丢弃：{self.drop_count}"
+                        )
+                    return
+
+                try:
+                    self.queue.put(task, timeout=timeout)
+                    break
+                except Full:
+                    continue
+
+        if self.dropping:
+            self.dropping = False
+            self.write_log(f"数据记录队列恢复，累计丢弃：{self.drop_count}")
+
+        self.max_queue_size = max(self.max_queue_size, self.queue.qsize())
+
+    def get_queue_statistics(self) -> dict:
+        """
+        Get backpressure statistics of task queue.
+        """
+        return {
+            "queue_size": self.queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "full_count": self.full_count,
+            "drop_count": self.drop_count,
+            "flush_count": self.flush_count,
+            "saved_count": self.saved_count
+        }
 
     def close(self):
         """"""
@@ -243,12 +375,12 @@ class RecorderEngine(BaseEngine):
     def record_tick(self, tick: TickData):
         """"""
         task = ("tick", copy(tick))
-        self.queue.put(task)
+        self.put_task(task)
 
     def record_bar(self, bar: BarData):
         """"""
         task = ("bar", copy(bar))
-        self.queue.put(task)
+        self.put_task(task)
 
     def get_bar_generator(self, vt_symbol: str):
         """"""
@@ -16,6 +16,8 @@ EVENT_RTD_LOG = "eRtdLog"
 REP_ADDRESS = "tcp://*:9001"
 PUB_ADDRESS = "tcp://*:9002"
 
+TICK_INTERVAL = 0.5     # seconds between tick pushes of the same symbol
+
 
 class RtdEngine(BaseEngine):
     """
@@ -39,7 +41,9 @@ class RtdEngine(BaseEngine):
         """
         Register event handler.
         """
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register_conflated(
+            EVENT_TICK, self.process_tick_event, TICK_INTERVAL
+        )
 
     def process_tick_event(self, event: Event) -> None:
         """
@@ -18,6 +18,8 @@ EVENT_RADAR_RULE = "eRadarRule"
 EVENT_RADAR_UPDATE = "eRadarUpdate"
 EVENT_RADAR_LOG = "eRaderLog"
 
+TICK_INTERVAL = 0.5     # seconds between radar updates of the same symbol
+
 
 class RadarRule:
     """"""
@@ -55,7 +57,9 @@ class RadarEngine(BaseEngine):
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register_conflated(
+            EVENT_TICK, self.process_tick_event, TICK_INTERVAL
+        )
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
 
     def process_tick_event(self, event: Event) -> None:
@@ -11,9 +11,9 @@ from plotly.subplots import make_subplots
 from pandas import DataFrame
 
 from vnpy.trader.constant import Direction, Offset, Interval, Status
-from vnpy.trader.database import database_manager
+from vnpy.trader.database.datafile import get_backtesting_source
 from vnpy.trader.object import OrderData, TradeData, BarData
-from vnpy.trader.utility import round_to, extract_vt_symbol
+from vnpy.trader.utility import round_to, extract_vt_symbol, MatchingBook
 
 from .template import StrategyTemplate
 
@@ -56,6 +56,7 @@ class BacktestingEngine:
         self.limit_order_count = 0
         self.limit_orders = {}
         self.active_limit_orders = {}
+        self.limit_books: Dict[str, MatchingBook] = defaultdict(MatchingBook)
 
         self.trade_count = 0
         self.trades = {}
@@ -76,6 +77,7 @@ class BacktestingEngine:
         self.limit_order_count = 0
         self.limit_orders.clear()
         self.active_limit_orders.clear()
+        self.limit_books.clear()
 
         self.trade_count = 0
         self.trades.clear()
@@ -522,7 +524,24 @@ class BacktestingEngine:
         """
         Cross limit order with last bar/tick data.
         """
-        for order in list(self.active_limit_orders.values()):
+        matched_orders = []
+        for vt_symbol, book in self.limit_books.items():
+            bar = self.bars.get(vt_symbol, None)
+            if not bar:
+                continue
+
+            matched_orders.extend(book.match_orders(
+                bar.low_price, bar.high_price, include_new=True
+            ))
+
+        # Merge orders of all symbols in the order they were sent
+        matched_orders.sort(key=lambda x: x[0])
+
+        for _, order in matched_orders:
+            # Skip orders cancelled by callback of previous crossed order
+            if order.vt_orderid not in self.active_limit_orders:
+                continue
+
             bar = self.bars[order.vt_symbol]
 
             long_cross_price = bar.low_price
@@ -557,6 +576,7 @@ class BacktestingEngine:
             self.strategy.update_order(order)
 
             self.active_limit_orders.pop(order.vt_orderid)
+            self.limit_books[order.vt_symbol].remove_order(order.vt_orderid)
 
             # Push trade update
             self.trade_count += 1
@@ -622,6 +642,12 @@ class BacktestingEngine:
 
         self.active_limit_orders[order.vt_orderid] = order
         self.limit_orders[order.vt_orderid] = order
+        self.limit_books[vt_symbol].add_order(
+            order.vt_orderid,
+            order,
+            direction == Direction.LONG,
+            price
+        )
 
         return [order.vt_orderid]
 
@@ -632,6 +658,7 @@ class BacktestingEngine:
         if vt_orderid not in self.active_limit_orders:
             return
         order = self.active_limit_orders.pop(vt_orderid)
+        self.limit_books[order.vt_symbol].remove_order(vt_orderid)
 
         order.status = Status.CANCELLED
         self.strategy.update_order(order)
@@ -844,6 +871,6 @@ def load_bar_data(
     """"""
     symbol, exchange = extract_vt_symbol(vt_symbol)
 
-    return database_manager.load_bar_data(
+    return get_backtesting_source().load_bar_data(
         symbol, exchange, interval, start, end
     )
@@ -10,6 +10,7 @@ from plotly.subplots import make_subplots
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.object import TradeData, BarData, TickData
+from vnpy.trader.utility import MatchingBook
 
 from .template import SpreadStrategyTemplate, SpreadAlgoTemplate
 from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data
@@ -47,6 +48,7 @@ class BacktestingEngine:
         self.algo_count = 0
         self.algos = {}
         self.active_algos = {}
+        self.algo_book = MatchingBook()
 
         self.trade_count = 0
         self.trades = {}
@@ -74,6 +76,7 @@ class BacktestingEngine:
         self.algo_count = 0
         self.algos.clear()
         self.active_algos.clear()
+        self.algo_book.clear()
 
         self.trade_count = 0
         self.trades.clear()
@@ -466,7 +469,14 @@ class BacktestingEngine:
             long_cross_price = self.tick.ask_price_1
             short_cross_price = self.tick.bid_price_1
 
-        for algo in list(self.active_algos.values()):
+        matched_algos = self.algo_book.match_orders(
+            long_cross_price, short_cross_price
+        )
+
+        for _, algo in matched_algos:
+            if algo.algoid not in self.active_algos:
+                continue
+
             # Check whether limit orders can be filled.
             long_cross = (
                 algo.direction == Direction.LONG
@@ -487,6 +497,7 @@ class BacktestingEngine:
             self.strategy.update_spread_algo(algo)
 
             self.active_algos.pop(algo.algoid)
+            self.algo_book.remove_order(algo.algoid)
 
             # Push trade update
             self.trade_count += 1
@@ -564,6 +575,12 @@ class BacktestingEngine:
 
         self.algos[algoid] = algo
         self.active_algos[algoid] = algo
+        self.algo_book.add_order(
+            algoid,
+            algo,
+            direction == Direction.LONG,
+            price
+        )
 
         return algoid
 
@@ -576,6 +593,7 @@ class BacktestingEngine:
         if algoid not in self.active_algos:
             return
         algo = self.active_algos.pop(algoid)
+        self.algo_book.remove_order(algoid)
 
         algo.status = Status.CANCELLED
         self.strategy.update_spread_algo(algo)
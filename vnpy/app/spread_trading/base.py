@@ -9,7 +9,7 @@ from vnpy.trader.object import (
 )
 from vnpy.trader.constant import Direction, Offset, Exchange, Interval
 from vnpy.trader.utility import floor_to, ceil_to, round_to, extract_vt_symbol
-from vnpy.trader.database import database_manager
+from vnpy.trader.database.datafile import get_backtesting_source
 
 
 EVENT_SPREAD_DATA = "eSpreadData"
@@ -513,7 +513,7 @@ def load_bar_data(
     for vt_symbol in spread.legs.keys():
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
-        bar_data: List[BarData] = database_manager.load_bar_data(
+        bar_data: List[BarData] = get_backtesting_source().load_bar_data(
             symbol, exchange, interval, start, end
         )
 
@@ -566,6 +566,6 @@ def load_tick_data(
     end: datetime
 ):
     """"""
-    return database_manager.load_tick_data(
+    return get_backtesting_source().load_tick_data(
         spread.name, Exchange.LOCAL, start, end
     )
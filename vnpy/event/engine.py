@@ -2,13 +2,24 @@
 Event-driven framework of vn.py framework.
 """
 
-from collections import defaultdict
+import json
+from collections import defaultdict, deque
 from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from threading import Thread, Condition, Lock
+from time import sleep, perf_counter, monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .monitor import EventMonitor, merge_histograms
 
 EVENT_TIMER = "eTimer"
+EVENT_MONITOR = "eMonitor"
+EVENT_CONFLATE = "eConflate"
+
+CONFLATOR_INTERVAL = 0.05    # seconds between checks of conflated handlers
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
 
 
 class Event:
@@ -16,18 +27,157 @@ class Event:
     Event object consists of a type string which is used
     by event engine for distributing event, and a data
     object which contains the real data.
+
+    An optional key (vt_symbol, vt_orderid, etc.) can be attached, then
+    event engine also distributes the event to handlers listening to
+    type + key, without putting another event into queue.
     """
 
-    def __init__(self, type: str, data: Any = None):
+    __slots__ = ("type", "data", "key", "time")
+
+    def __init__(self, type: str, data: Any = None, key: str = ""):
         """"""
         self.type: str = type
         self.data: Any = data
+        self.key: str = key
+        self.time: float = 0    # put time, only recorded by monitor
 
 
 # Defines handler function to be used in event engine.
 HandlerType = Callable[[Event], None]
 
 
+class ConflatedHandler:
+    """
+    Keep only the newest event of each key (vt_symbol by default), and
+    push them to handler at most once per interval.
+    """
+
+    def __init__(self, handler: HandlerType, interval: float):
+        """"""
+        self.handler: HandlerType = handler
+        self.interval: float = interval
+        self.events: Dict[str, Event] = {}
+        self.lock: Lock = Lock()
+        self.next_time: float = 0
+
+    def __call__(self, event: Event) -> None:
+        """
+        Save event to be pushed later.
+        """
+        key = event.key or getattr(event.data, "vt_symbol", event.type)
+
+        with self.lock:
+            self.events[key] = event
+
+    def check_due(self, now: float) -> bool:
+        """
+        Check whether events should be pushed now.
+        """
+        if not self.events or now < self.next_time:
+            return False
+
+        self.next_time = now + self.interval
+        return True
+
+    def flush(self) -> None:
+        """
+        Push newest events to handler.
+        """
+        with self.lock:
+            events = self.events
+            self.events = {}
+
+        for event in events.values():
+            self.handler(event)
+
+
+class LaneQueue:
+    """
+    Event queue with one FIFO lane for each priority class.
+
+    Get always returns event from the lane with highest priority (lowest
+    number) which is not empty, so events of the same type are still in
+    order. Priority of an event type is found by exact match first, then
+    by prefix (e.g. eTick. for eTick.rb2010.SHFE), otherwise normal.
+    """
+
+    def __init__(self, priorities: Dict[str, int]):
+        """"""
+        self.priorities: Dict[str, int] = priorities
+        self.type_priorities: Dict[str, int] = {}
+        lane_count = max(PRIORITY_LOW, *priorities.values()) + 1
+        self.lanes: List[deque] = [deque() for _ in range(lane_count)]
+        self.size: int = 0
+        self.condition: Condition = Condition()
+
+    def get_priority(self, type: str) -> int:
+        """
+        Priority found is cached, so prefix matching runs only once for
+        each event type.
+        """
+        priority = self.type_priorities.get(type, None)
+        if priority is not None:
+            return priority
+
+        priority = self.priorities.get(type, None)
+        if priority is None:
+            priority = PRIORITY_NORMAL
+
+            for prefix, prefix_priority in self.priorities.items():
+                if type.startswith(prefix):
+                    priority = prefix_priority
+                    break
+
+        self.type_priorities[type] = priority
+        return priority
+
+    def put(self, event: Event) -> None:
+        """"""
+        lane = self.lanes[self.get_priority(event.type)]
+
+        with self.condition:
+            lane.append(event)
+            self.size += 1
+            self.condition.notify()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Event:
+        """
+        Same as Queue.get, raise Empty if no event available.
+        """
+        with self.condition:
+            if not self.size:
+                if not block:
+                    raise Empty
+
+                end = monotonic() + timeout if timeout is not None else None
+                while not self.size:
+                    if end is None:
+                        self.condition.wait()
+                    else:
+                        remaining = end - monotonic()
+                        if remaining <= 0:
+                            raise Empty
+                        self.condition.wait(remaining)
+
+            self.size -= 1
+            for lane in self.lanes:
+                if lane:
+                    return lane.popleft()
+
+    def get_nowait(self) -> Event:
+        """"""
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        """"""
+        return self.size
+
+    def empty(self) -> bool:
+        """"""
+        return not self.size
+
+
 class EventEngine:
     """
     Event engine distributes event object based on its type
@@ -35,31 +185,90 @@ class EventEngine:
 
     It also generates timer event by every interval seconds,
     which can be used for timing purpose.
+
+    With more than one worker, events are sharded to worker threads by
+    vt_symbol of event data (or by event type if data has no vt_symbol).
+    Events of the same key are still processed in order, while events of
+    different keys can be processed in parallel, so handlers must be
+    thread safe in this mode.
+
+    With priorities given (event type: priority class), each worker queue
+    is split into lanes, and events of higher priority (e.g. order and
+    trade) are processed before those of lower priority (e.g. tick, log).
+
+    With monitor enabled, queue latency of each event type and execution
+    time of each handler are recorded, and statistics are put as monitor
+    event every monitor_interval seconds, checked at each timer event.
     """
 
-    def __init__(self, interval: int = 1):
+    def __init__(
+        self,
+        interval: int = 1,
+        topic_dispatch: bool = False,
+        worker_count: int = 1,
+        monitor_interval: int = 0,
+        priorities: Dict[str, int] = None
+    ):
         """
         Timer event is generated every 1 second by default, if
         interval not specified.
+
+        If topic_dispatch is True, event published with a key is put
+        into queue only once and distributed to both handlers of type
+        and handlers of type + key.
+
+        Monitor event is generated every monitor_interval seconds (at
+        the first timer event after that), and disabled if 0.
         """
         self._interval: int = interval
-        self._queue: Queue = Queue()
+        self._topic_dispatch: bool = topic_dispatch
+        self._worker_count: int = max(worker_count, 1)
+        if priorities:
+            self._queues: List[Queue] = [
+                LaneQueue(priorities) for _ in range(self._worker_count)
+            ]
+        else:
+            self._queues: List[Queue] = [Queue() for _ in range(self._worker_count)]
+        self._queue: Queue = self._queues[0]
         self._active: bool = False
-        self._thread: Thread = Thread(target=self._run)
+        self._monitor_interval: int = monitor_interval
+        self._monitors: List[EventMonitor] = []
+        if monitor_interval:
+            self._monitors = [EventMonitor() for _ in self._queues]
+        self._threads: List[Thread] = [
+            Thread(target=self._run, args=(ix,)) for ix in range(self._worker_count)
+        ]
+        self._thread: Thread = self._threads[0]
         self._timer: Thread = Thread(target=self._run_timer)
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
 
-    def _run(self) -> None:
+        self._conflated_handlers: Dict[Tuple[str, HandlerType], ConflatedHandler] = {}
+        self._conflator: Thread = Thread(target=self._run_conflator)
+        self.register(EVENT_CONFLATE, self._process_conflate_event)
+
+    def _run(self, ix: int) -> None:
         """
         Get event from queue and then process it.
         """
-        while self._active:
-            try:
-                event = self._queue.get(block=True, timeout=1)
-                self._process(event)
-            except Empty:
-                pass
+        queue = self._queues[ix]
+
+        if self._monitors:
+            monitor = self._monitors[ix]
+
+            while self._active:
+                try:
+                    event = queue.get(block=True, timeout=1)
+                    self._process_monitored(event, monitor)
+                except Empty:
+                    pass
+        else:
+            while self._active:
+                try:
+                    event = queue.get(block=True, timeout=1)
+                    self._process(event)
+                except Empty:
+                    pass
 
     def _process(self, event: Event) -> None:
         """
@@ -69,28 +278,96 @@ class EventEngine:
         Then distrubute event to those general handlers which listens
         to all types.
         """
-        if event.type in self._handlers:
-            [handler(event) for handler in self._handlers[event.type]]
+        handlers = self._handlers.get(event.type, None)
+        if handlers:
+            for handler in handlers:
+                handler(event)
+
+        if event.key:
+            handlers = self._handlers.get(event.type + event.key, None)
+            if handlers:
+                for handler in handlers:
+                    handler(event)
+
+        for handler in self._general_handlers:
+            handler(event)
+
+    def _process_monitored(self, event: Event, monitor: EventMonitor) -> None:
+        """
+        Same as _process, but record latency and handler time.
+        """
+        start = perf_counter()
+        monitor.add_latency(event.type, start - event.time)
+
+        handlers = self._handlers.get(event.type, None)
+        if handlers:
+            for handler in handlers:
+                handler(event)
+                end = perf_counter()
+                monitor.add_handler_time(handler, end - start)
+                start = end
 
-        if self._general_handlers:
-            [handler(event) for handler in self._general_handlers]
+        if event.key:
+            handlers = self._handlers.get(event.type + event.key, None)
+            if handlers:
+                for handler in handlers:
+                    handler(event)
+                    end = perf_counter()
+                    monitor.add_handler_time(handler, end - start)
+                    start = end
+
+        for handler in self._general_handlers:
+            handler(event)
+            end = perf_counter()
+            monitor.add_handler_time(handler, end - start)
+            start = end
 
     def _run_timer(self) -> None:
         """
         Sleep by interval second(s) and then generate a timer event.
         """
+        elapsed = 0
+
         while self._active:
             sleep(self._interval)
             event = Event(EVENT_TIMER)
             self.put(event)
 
+            if self._monitor_interval:
+                elapsed += self._interval
+                if elapsed >= self._monitor_interval:
+                    elapsed = 0
+                    event = Event(EVENT_MONITOR, self.get_statistics(reset=True))
+                    self.put(event)
+
+    def _run_conflator(self) -> None:
+        """
+        Check conflated handlers and put conflate event for those due.
+
+        Events are pushed by worker thread, same as normal handlers.
+        """
+        while self._active:
+            sleep(CONFLATOR_INTERVAL)
+
+            now = monotonic()
+            for conflated_handler in list(self._conflated_handlers.values()):
+                if conflated_handler.check_due(now):
+                    self.put(Event(EVENT_CONFLATE, conflated_handler))
+
+    def _process_conflate_event(self, event: Event) -> None:
+        """"""
+        conflated_handler: ConflatedHandler = event.data
+        conflated_handler.flush()
+
     def start(self) -> None:
         """
         Start event engine to process events and generate timer events.
         """
         self._active = True
-        self._thread.start()
+        for thread in self._threads:
+            thread.start()
         self._timer.start()
+        self._conflator.start()
 
     def stop(self) -> None:
         """
@@ -98,13 +375,87 @@ class EventEngine:
         """
         self._active = False
         self._timer.join()
-        self._thread.join()
+        self._conflator.join()
+        for thread in self._threads:
+            thread.join()
 
     def put(self, event: Event) -> None:
         """
         Put an event object into event queue.
         """
-        self._queue.put(event)
+        if self._monitors:
+            event.time = perf_counter()
+
+        if self._worker_count == 1:
+            self._queue.put(event)
+        else:
+            self._queues[self.get_worker(event)].put(event)
+
+    def get_worker(self, event: Event) -> int:
+        """
+        Get index of worker to process the event.
+
+        Tick, order, trade and position of the same vt_symbol go to the
+        same worker, so their ordering is kept.
+        """
+        key = getattr(event.data, "vt_symbol", None)
+        if not key:
+            key = event.type
+        return hash(key) % self._worker_count
+
+    def publish(self, type: str, data: Any = None, key: str = "") -> None:
+        """
+        Publish data to handlers of type, and also handlers of type + key
+        if key is given.
+
+        With topic dispatch, only one event is put into queue, and the key
+        is dropped if no handler is listening to type + key. Otherwise two
+        events are put as before: one of type and one of type + key.
+        """
+        if not key:
+            self.put(Event(type, data))
+        elif self._topic_dispatch:
+            if type + key not in self._handlers:
+                key = ""
+            self.put(Event(type, data, key))
+        else:
+            self.put(Event(type, data))
+            self.put(Event(type + key, data))
+
+    def get_statistics(self, reset: bool = False) -> dict:
+        """
+        Get statistics recorded by monitor since last reset.
+
+        Time values are in microseconds, and the result can be dumped
+        as json directly.
+        """
+        statistics = {
+            "queue_size": [queue.qsize() for queue in self._queues],
+            "event_latency": merge_histograms(
+                [monitor.latencies for monitor in self._monitors]
+            ),
+            "handler_time": merge_histograms(
+                [monitor.handler_times for monitor in self._monitors]
+            )
+        }
+
+        if reset:
+            for monitor in self._monitors:
+                monitor.reset()
+
+        return statistics
+
+    def export_statistics(self, filepath: str) -> None:
+        """
+        Save monitor statistics into json file.
+        """
+        with open(filepath, mode="w+", encoding="UTF-8") as f:
+            json.dump(
+                self.get_statistics(),
+                f,
+                indent=4,
+                ensure_ascii=False
+            )
 
     def register(self, type: str, handler: HandlerType) -> None:
         """
@@ -127,6 +478,33 @@ class EventEngine:
         if not handler_list:
             self._handlers.pop(type)
 
+    def register_conflated(
+        self,
+        type: str,
+        handler: HandlerType,
+        interval: float
+    ) -> None:
+        """
+        Register a handler which receives at most one event of each key
+        (vt_symbol by default) every interval seconds, always the newest
+        one. Suitable for slow consumers like UI which only need latest
+        data.
+        """
+        if (type, handler) in self._conflated_handlers:
+            return
+
+        conflated_handler = ConflatedHandler(handler, interval)
+        self._conflated_handlers[(type, handler)] = conflated_handler
+        self.register(type, conflated_handler)
+
+    def unregister_conflated(self, type: str, handler: HandlerType) -> None:
+        """
+        Unregister an existing conflated handler.
+        """
+        conflated_handler = self._conflated_handlers.pop((type, handler), None)
+        if conflated_handler:
+            self.unregister(type, conflated_handler)
+
     def register_general(self, handler: HandlerType) -> None:
         """
         Register a new handler function for all event types. Every
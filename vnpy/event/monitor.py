@@ -0,0 +1,138 @@
+"""
+Latency and throughput statistics of event engine.
+"""
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List
+
+# Upper edges of histogram buckets in microseconds, growing by 2^(1/4)
+# from 1us to about 134s, so percentile error is within 19%.
+BUCKET_EDGES: List[float] = [2 ** (i / 4) for i in range(4 * 27 + 1)]
+
+# Limit number of event types recorded, since event type with key
+# (e.g. eOrder.vt_orderid) is unbounded.
+MAX_TYPE_COUNT: int = 200
+OTHER_TYPE: str = "others"
+
+
+class Histogram:
+    """
+    Log scaled histogram of time values.
+    """
+
+    def __init__(self):
+        """"""
+        self.counts: List[int] = [0] * (len(BUCKET_EDGES) + 1)
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+
+    def add(self, value: float) -> None:
+        """
+        Add a time value in seconds.
+        """
+        value *= 1_000_000
+
+        self.counts[bisect_right(BUCKET_EDGES, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        """"""
+        for ix, count in enumerate(other.counts):
+            self.counts[ix] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def get_percentile(self, percent: float) -> float:
+        """
+        Get approximate percentile value in microseconds.
+        """
+        target = self.count * percent / 100
+        cumulated = 0
+
+        for ix, count in enumerate(self.counts):
+            cumulated += count
+            if count and cumulated >= target:
+                if ix < len(BUCKET_EDGES):
+                    return min(BUCKET_EDGES[ix], self.max)
+                break
+
+        return self.max
+
+    def get_statistics(self) -> Dict[str, float]:
+        """
+        Get statistics with time values in microseconds.
+        """
+        if self.count:
+            mean = self.total / self.count
+        else:
+            mean = 0
+
+        return {
+            "count": self.count,
+            "mean": round(mean, 1),
+            "p50": round(self.get_percentile(50), 1),
+            "p99": round(self.get_percentile(99), 1),
+            "max": round(self.max, 1),
+        }
+
+
+class EventMonitor:
+    """
+    Statistics recorded by one worker thread of event engine.
+    """
+
+    def __init__(self):
+        """"""
+        self.latencies: Dict[str, Histogram] = {}
+        self.handler_times: Dict[str, Histogram] = {}
+        self.handler_names: Dict[Any, str] = {}
+
+    def add_latency(self, type: str, value: float) -> None:
+        """
+        Record time from event put into queue to being processed.
+        """
+        histogram = self.latencies.get(type, None)
+        if not histogram:
+            if len(self.latencies) >= MAX_TYPE_COUNT:
+                type = OTHER_TYPE
+            histogram = self.latencies.setdefault(type, Histogram())
+        histogram.add(value)
+
+    def add_handler_time(self, handler: Callable, value: float) -> None:
+        """
+        Record execution time of handler.
+        """
+        name = self.handler_names.get(handler, None)
+        if not name:
+            name = getattr(handler, "__qualname__", repr(handler))
+            self.handler_names[handler] = name
+
+        histogram = self.handler_times.get(name, None)
+        if not histogram:
+            histogram = self.handler_times.setdefault(name, Histogram())
+        histogram.add(value)
+
+    def reset(self) -> None:
+        """"""
+        self.latencies = {}
+        self.handler_times = {}
+
+
+def merge_histograms(histogram_maps: List[Dict[str, Histogram]]) -> Dict[str, dict]:
+    """
+    Merge histograms of all workers and return their statistics.
+    """
+    merged: Dict[str, Histogram] = {}
+
+    for histograms in histogram_maps:
+        for name, histogram in list(histograms.items()):
+            if name not in merged:
+                merged[name] = Histogram()
+            merged[name].merge(histogram)
+
+    return {name: histogram.get_statistics() for name, histogram in merged.items()}
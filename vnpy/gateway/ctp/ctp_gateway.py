@@ -62,7 +62,7 @@ from vnpy.trader.object import (
     CancelRequest,
     SubscribeRequest,
 )
-from vnpy.trader.utility import get_folder_path
+from vnpy.trader.utility import get_folder_path, DatetimeBuilder
 from vnpy.trader.event import EVENT_TIMER
 
 
@@ -120,6 +120,7 @@ OPTIONTYPE_CTP2VT = {
 
 MAX_FLOAT = sys.float_info.max
 CHINA_TZ = pytz.timezone("Asia/Shanghai")
+DATETIME_BUILDER = DatetimeBuilder(CHINA_TZ)
 
 
 symbol_exchange_map = {}
@@ -311,9 +312,11 @@ class CtpMdApi(MdApi):
         if not exchange:
             return
 
-        timestamp = f"{self.current_date} {data['UpdateTime']}.{int(data['UpdateMillisec']/100)}"
-        dt = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S.%f")
-        dt = CHINA_TZ.localize(dt)
+        dt = DATETIME_BUILDER.build_from_time(
+            self.current_date,
+            data["UpdateTime"],
+            int(data["UpdateMillisec"] / 100) * 100_000
+        )
 
         tick = TickData(
             symbol=symbol,
@@ -669,9 +672,7 @@ class CtpTdApi(TdApi):
         order_ref = data["OrderRef"]
         orderid = f"{frontid}_{sessionid}_{order_ref}"
 
-        timestamp = f"{data['InsertDate']} {data['InsertTime']}"
-        dt = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S")
-        dt = CHINA_TZ.localize(dt)
+        dt = DATETIME_BUILDER.build_from_time(data["InsertDate"], data["InsertTime"])
 
         order = OrderData(
             symbol=symbol,
@@ -704,9 +705,7 @@ class CtpTdApi(TdApi):
 
         orderid = self.sysid_orderid_map[data["OrderSysID"]]
 
-        timestamp = f"{data['TradeDate']} {data['TradeTime']}"
-        dt = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S")
-        dt = CHINA_TZ.localize(dt)
+        dt = DATETIME_BUILDER.build_from_time(data["TradeDate"], data["TradeTime"])
 
         trade = TradeData(
             symbol=symbol,
@@ -27,7 +27,7 @@ from vnpy.trader.object import (
     PositionData,
     AccountData
 )
-from vnpy.trader.utility import get_folder_path, round_to
+from vnpy.trader.utility import get_folder_path, round_to, DatetimeBuilder
 
 
 MARKET_XTP2VT: Dict[int, Exchange] = {
@@ -121,6 +121,7 @@ OPTIONTYPE_XTP2VT = {
 }
 
 CHINA_TZ = pytz.timezone("Asia/Shanghai")
+DATETIME_BUILDER = DatetimeBuilder(CHINA_TZ)
 
 symbol_name_map: Dict[str, str] = {}
 symbol_pricetick_map: Dict[str, float] = {}
@@ -263,9 +264,7 @@ class XtpMdApi(MdApi):
 
     def onDepthMarketData(self, data: dict) -> None:
         """"""
-        timestamp = str(data["data_time"])
-        dt = datetime.strptime(timestamp, "%Y%m%d%H%M%S%f")
-        dt = CHINA_TZ.localize(dt)
+        dt = DATETIME_BUILDER.build_from_int(data["data_time"])
 
         tick = TickData(
             symbol=data["ticker"],
@@ -528,9 +527,7 @@ class XtpTdApi(TdApi):
 
         orderid = str(data["order_xtp_id"])
         if orderid not in self.orders:
-            timestamp = str(data["insert_time"])
-            dt = datetime.strptime(timestamp, "%Y%m%d%H%M%S%f")
-            dt = CHINA_TZ.localize(dt)
+            dt = DATETIME_BUILDER.build_from_int(data["insert_time"])
 
             order = OrderData(
                 symbol=symbol,
@@ -563,9 +560,7 @@ class XtpTdApi(TdApi):
         else:
             direction, offset = DIRECTION_STOCK_XTP2VT[data["side"]]
 
-        timestamp = str(data["trade_time"])
-        dt = datetime.strptime(timestamp, "%Y%m%d%H%M%S%f")
-        dt = CHINA_TZ.localize(dt)
+        dt = DATETIME_BUILDER.build_from_int(data["trade_time"])
 
         trade = TradeData(
             symbol=symbol,
@@ -1,18 +1,27 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence, List, Dict, TYPE_CHECKING
+from typing import Optional, Sequence, List, Dict, Iterator, TYPE_CHECKING
 from pytz import timezone
 
 from vnpy.trader.setting import SETTINGS
+from vnpy.trader.object import BarData, TickData, SlotBarData, SlotTickData
+from vnpy.trader.utility import BarArray
 
 if TYPE_CHECKING:
     from vnpy.trader.constant import Interval, Exchange  # noqa
-    from vnpy.trader.object import BarData, TickData  # noqa
 
 
 DB_TZ = timezone(SETTINGS["database.timezone"])
 
+# Class of data objects loaded from database
+if SETTINGS["database.slot_data"]:
+    DB_BAR_CLASS = SlotBarData
+    DB_TICK_CLASS = SlotTickData
+else:
+    DB_BAR_CLASS = BarData
+    DB_TICK_CLASS = TickData
+
 
 class Driver(Enum):
     SQLITE = "sqlite"
@@ -20,6 +29,7 @@ class Driver(Enum):
     POSTGRESQL = "postgresql"
     MONGODB = "mongodb"
     INFLUX = "influxdb"
+    PARQUET = "parquet"
 
 
 class BaseDatabaseManager(ABC):
@@ -45,6 +55,67 @@ class BaseDatabaseManager(ABC):
     ) -> Sequence["TickData"]:
         pass
 
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List["BarData"]]:
+        """
+        Yield bar data in chunks of chunk_size, ordered by datetime.
+
+        Default implementation loads all data at once, database managers
+        should override this to keep memory usage constant.
+        """
+        data = self.load_bar_data(symbol, exchange, interval, start, end)
+        for i in range(0, len(data), chunk_size):
+            yield data[i: i + chunk_size]
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List["TickData"]]:
+        """
+        Yield tick data in chunks of chunk_size, ordered by datetime.
+
+        Default implementation loads all data at once, database managers
+        should override this to keep memory usage constant.
+        """
+        data = self.load_tick_data(symbol, exchange, start, end)
+        for i in range(0, len(data), chunk_size):
+            yield data[i: i + chunk_size]
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        start: datetime,
+        end: datetime
+    ) -> BarArray:
+        """
+        Load bar data into columnar bar array.
+
+        Default implementation converts each chunk of bar data into
+        columnar data, columnar databases should override this to
+        skip creating BarData.
+        """
+        bar_array = BarArray.from_bars([], symbol, exchange, interval)
+
+        arrays = [
+            BarArray.from_bars(bars, symbol, exchange, interval)
+            for bars in self.iter_bar_data(symbol, exchange, interval, start, end)
+        ]
+
+        return bar_array.concat(*arrays)
+
     @abstractmethod
     def save_bar_data(
         self,
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Sequence, List
+from typing import Optional, Sequence, List, Iterator
 
 from influxdb import InfluxDBClient
 
@@ -7,7 +7,7 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import generate_vt_symbol
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import BaseDatabaseManager, Driver, DB_TZ, DB_BAR_CLASS
 
 
 influx_database = ""
@@ -71,7 +71,7 @@ class InfluxManager(BaseDatabaseManager):
         for d in points:
             dt = datetime.strptime(d["time"], "%Y-%m-%dT%H:%M:%SZ")
 
-            bar = BarData(
+            bar = DB_BAR_CLASS(
                 symbol=symbol,
                 exchange=exchange,
                 interval=interval,
@@ -93,6 +93,85 @@ class InfluxManager(BaseDatabaseManager):
     ) -> Sequence[TickData]:
         pass
 
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[BarData]]:
+        """
+        Query bar data page by page with time of last point as key.
+        """
+        if isinstance(start, datetime):
+            start = start.date()
+
+        if isinstance(end, datetime):
+            end = end.date()
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+            "interval": interval.value
+        }
+
+        time_condition = f"time >= '{start.isoformat()}'"
+
+        while True:
+            query = (
+                "select * from bar_data"
+                " where vt_symbol=$vt_symbol"
+                " and interval=$interval"
+                f" and {time_condition}"
+                f" and time <= '{end.isoformat()}'"
+                f" limit {chunk_size};"
+            )
+
+            result = influx_client.query(query, bind_params=bind_params)
+            points = list(result.get_points())
+            if not points:
+                break
+
+            data = []
+            for d in points:
+                dt = datetime.strptime(d["time"], "%Y-%m-%dT%H:%M:%SZ")
+
+                bar = DB_BAR_CLASS(
+                    symbol=symbol,
+                    exchange=exchange,
+                    interval=interval,
+                    datetime=DB_TZ.localize(dt),
+                    open_price=d["open_price"],
+                    high_price=d["high_price"],
+                    low_price=d["low_price"],
+                    close_price=d["close_price"],
+                    volume=d["volume"],
+                    open_interest=d["open_interest"],
+                    gateway_name="DB"
+                )
+                data.append(bar)
+
+            yield data
+
+            if len(points) < chunk_size:
+                break
+
+            time_condition = f"time > '{points[-1]['time']}'"
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[TickData]]:
+        """
+        Tick data is not stored in influxdb yet.
+        """
+        return iter([])
+
     def save_bar_data(self, data: Sequence[BarData]):
         json_body = []
 
@@ -148,7 +227,7 @@ class InfluxManager(BaseDatabaseManager):
         for d in points:
             dt = datetime.strptime(d["time"], "%Y-%m-%dT%H:%M:%SZ")
 
-            bar = BarData(
+            bar = DB_BAR_CLASS(
                 symbol=symbol,
                 exchange=exchange,
                 interval=interval,
@@ -185,7 +264,7 @@ class InfluxManager(BaseDatabaseManager):
         for d in points:
             dt = datetime.strptime(d["time"], "%Y-%m-%dT%H:%M:%SZ")
 
-            bar = BarData(
+            bar = DB_BAR_CLASS(
                 symbol=symbol,
                 exchange=exchange,
                 interval=interval,
@@ -1,6 +1,7 @@
+from dataclasses import fields
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence, List
+from typing import Optional, Sequence, List, Iterator
 from tzlocal import get_localzone
 
 from mongoengine import DateTimeField, Document, FloatField, StringField, connect
@@ -8,7 +9,7 @@ from mongoengine import DateTimeField, Document, FloatField, StringField, connec
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import BaseDatabaseManager, Driver, DB_TZ, DB_BAR_CLASS, DB_TICK_CLASS
 
 
 LOCAL_TZ = get_localzone()
@@ -71,7 +72,7 @@ class DbBarData(Document):
         """
         Generate BarData object from DbBarData.
         """
-        bar = BarData(
+        bar = DB_BAR_CLASS(
             symbol=self.symbol,
             exchange=Exchange(self.exchange),
             datetime=DB_TZ.localize(self.datetime),
@@ -149,7 +150,7 @@ class DbTickData(Document):
         """
         Generate TickData object from DbTickData.
         """
-        tick = TickData(
+        tick = DB_TICK_CLASS(
             symbol=self.symbol,
             exchange=Exchange(self.exchange),
             datetime=DB_TZ.localize(self.datetime),
@@ -227,6 +228,66 @@ class MongoManager(BaseDatabaseManager):
         data = [db_tick.to_tick() for db_tick in s]
         return data
 
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[BarData]]:
+        """
+        Read bar data with server side cursor in batches of chunk_size.
+        """
+        s = DbBarData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            interval=interval.value,
+            datetime__gte=convert_tz(start),
+            datetime__lte=convert_tz(end),
+        ).order_by("datetime").no_cache().batch_size(chunk_size)
+
+        data = []
+        for db_bar in s:
+            data.append(db_bar.to_bar())
+
+            if len(data) == chunk_size:
+                yield data
+                data = []
+
+        if data:
+            yield data
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[TickData]]:
+        """
+        Read tick data with server side cursor in batches of chunk_size.
+        """
+        s = DbTickData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            datetime__gte=convert_tz(start),
+            datetime__lte=convert_tz(end),
+        ).order_by("datetime").no_cache().batch_size(chunk_size)
+
+        data = []
+        for db_tick in s:
+            data.append(db_tick.to_tick())
+
+            if len(data) == chunk_size:
+                yield data
+                data = []
+
+        if data:
+            yield data
+
     @staticmethod
     def to_update_param(d) -> dict:
         dt = d.datetime.astimezone(DB_TZ)
@@ -234,7 +295,7 @@ class MongoManager(BaseDatabaseManager):
 
         param = {
             "set__" + k: v.value if isinstance(v, Enum) else v
-            for k, v in d.__dict__.items()
+            for k, v in ((f.name, getattr(d, f.name)) for f in fields(d))
         }
         return param
 
@@ -242,7 +303,6 @@ class MongoManager(BaseDatabaseManager):
         for d in datas:
             updates = self.to_update_param(d)
             updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
             (
                 DbBarData.objects(
                     symbol=d.symbol, interval=d.interval.value, datetime=d.datetime
@@ -253,7 +313,6 @@ class MongoManager(BaseDatabaseManager):
         for d in datas:
             updates = self.to_update_param(d)
             updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
             (
                 DbTickData.objects(
                     symbol=d.symbol, exchange=d.exchange.value, datetime=d.datetime
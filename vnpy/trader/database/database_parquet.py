@@ -0,0 +1,480 @@
+"""
+Columnar database storing data in Parquet files.
+
+Data is partitioned by symbol, interval and month:
+    bar/{exchange}/{symbol}/{interval}/{YYYYMM}.parquet
+    tick/{exchange}/{symbol}/{YYYYMM}.parquet
+
+Datetime is stored as timestamp of database timezone without tzinfo,
+same as the sql databases.
+"""
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import (
+    BAR_DTYPE,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BarArray,
+    get_folder_path
+)
+
+from .database import BaseDatabaseManager, Driver, DB_TZ, DB_BAR_CLASS, DB_TICK_CLASS
+
+
+BAR_SCHEMA = pa.schema(
+    [("datetime", pa.timestamp("us"))]
+    + [(name, pa.float64()) for name in BAR_FIELDS]
+)
+
+TICK_SCHEMA = pa.schema(
+    [("datetime", pa.timestamp("us")), ("name", pa.string())]
+    + [(name, pa.float64()) for name in TICK_FIELDS]
+)
+
+COMPRESSION = "zstd"
+FILE_SUFFIX = ".parquet"
+
+HOUR_US = 3_600_000_000
+NAIVE_EPOCH = datetime(1970, 1, 1)
+
+
+def init(_: Driver, settings: dict):
+    database = settings["database"]
+    root = get_folder_path(database)
+    return ParquetManager(root)
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Change datetime to database timezone without tzinfo.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt
+
+
+def get_month_name(dt: datetime) -> str:
+    """"""
+    return f"{dt.year}{dt.month:02d}"
+
+
+def localize_timestamps(timestamps: np.ndarray) -> Tuple[np.ndarray, list]:
+    """
+    Convert naive timestamps (us) of database timezone into UTC timestamps.
+
+    Timezone is only looked up once for each hour, which also gives the
+    tzinfo of each timestamp for creating datetime objects.
+    """
+    hours = timestamps // HOUR_US
+    unique_hours, inverse = np.unique(hours, return_inverse=True)
+
+    offsets = np.empty(len(unique_hours), dtype=np.int64)
+    tzinfos = []
+
+    for ix, hour in enumerate(unique_hours.tolist()):
+        dt = DB_TZ.localize(NAIVE_EPOCH + timedelta(hours=hour))
+        offsets[ix] = dt.utcoffset() // timedelta(microseconds=1)
+        tzinfos.append(dt.tzinfo)
+
+    utc_timestamps = timestamps - offsets[inverse]
+    return utc_timestamps, [tzinfos[ix] for ix in inverse.tolist()]
+
+
+def localize_column(column: pa.ChunkedArray) -> List[datetime]:
+    """
+    Convert timestamp column into list of datetime with DB_TZ tzinfo.
+    """
+    timestamps = column.to_numpy().view(np.int64)
+    _, tzinfos = localize_timestamps(timestamps)
+
+    return [
+        dt.replace(tzinfo=tz)
+        for dt, tz in zip(column.to_pylist(), tzinfos)
+    ]
+
+
+class ParquetManager(BaseDatabaseManager):
+
+    def __init__(self, root: Path):
+        """"""
+        self.root: Path = root
+
+    def get_bar_folder(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Path:
+        """"""
+        return self.root.joinpath("bar", exchange.value, symbol, interval.value)
+
+    def get_tick_folder(self, symbol: str, exchange: Exchange) -> Path:
+        """"""
+        return self.root.joinpath("tick", exchange.value, symbol)
+
+    def get_file_paths(
+        self,
+        folder: Path,
+        start: datetime = None,
+        end: datetime = None
+    ) -> List[Path]:
+        """
+        Get month files in folder overlapping with start/end, ordered by month.
+        """
+        if not folder.exists():
+            return []
+
+        paths = sorted(folder.glob(f"*{FILE_SUFFIX}"))
+
+        if start:
+            start_name = get_month_name(start)
+            paths = [path for path in paths if path.stem >= start_name]
+
+        if end:
+            end_name = get_month_name(end)
+            paths = [path for path in paths if path.stem <= end_name]
+
+        return paths
+
+    def read_table(
+        self,
+        folder: Path,
+        schema: pa.Schema,
+        start: datetime,
+        end: datetime
+    ) -> pa.Table:
+        """
+        Read rows within start/end, filtered by row group statistics first.
+        """
+        start = to_db_datetime(start)
+        end = to_db_datetime(end)
+
+        filters = [("datetime", ">=", start), ("datetime", "<=", end)]
+        tables = [
+            pq.read_table(path, filters=filters, schema=schema)
+            for path in self.get_file_paths(folder, start, end)
+        ]
+
+        if not tables:
+            return schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def write_table(self, path: Path, table: pa.Table, schema: pa.Schema):
+        """
+        Merge table into month file, rows of same datetime are replaced.
+        """
+        if path.exists():
+            table = pa.concat_tables([pq.read_table(path, schema=schema), table])
+
+        # Keep the last row of each datetime
+        timestamps = table.column("datetime").to_numpy().view(np.int64)
+        reversed_timestamps = timestamps[::-1]
+        _, ix = np.unique(reversed_timestamps, return_index=True)
+        indices = len(timestamps) - 1 - ix
+        table = table.take(indices)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write into temp file first, so that the month file is never
+        # left half written when process is killed. Temp file is named
+        # with pid so that writers in different processes do not clash.
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(table, temp_path, compression=COMPRESSION)
+        os.replace(temp_path, path)
+
+    def save_table(self, folder: Path, table: pa.Table, schema: pa.Schema):
+        """
+        Split table by month and merge into each month file.
+        """
+        months = table.column("datetime").to_numpy().astype("datetime64[M]")
+
+        for month in np.unique(months):
+            month_table = table.filter(pa.array(months == month))
+            name = month.item().strftime("%Y%m")
+            path = folder.joinpath(f"{name}{FILE_SUFFIX}")
+            self.write_table(path, month_table, schema)
+
+    def to_bars(
+        self,
+        table: pa.Table,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> List[BarData]:
+        """"""
+        datetimes = localize_column(table.column("datetime"))
+        columns = [table.column(name).to_pylist() for name in BAR_FIELDS]
+
+        bars = []
+        for dt, values in zip(datetimes, zip(*columns)):
+            (
+                open_price,
+                high_price,
+                low_price,
+                close_price,
+                volume,
+                open_interest
+            ) = values
+
+            bar = DB_BAR_CLASS(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                interval=interval,
+                volume=volume,
+                open_interest=open_interest,
+                open_price=open_price,
+                high_price=high_price,
+                low_price=low_price,
+                close_price=close_price,
+                gateway_name="DB",
+            )
+            bars.append(bar)
+
+        return bars
+
+    def to_ticks(
+        self,
+        table: pa.Table,
+        symbol: str,
+        exchange: Exchange
+    ) -> List[TickData]:
+        """"""
+        datetimes = localize_column(table.column("datetime"))
+        names = table.column("name").to_pylist()
+        columns = [table.column(name).to_pylist() for name in TICK_FIELDS]
+
+        ticks = []
+        for dt, name, values in zip(datetimes, names, zip(*columns)):
+            tick = DB_TICK_CLASS(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                name=name,
+                gateway_name="DB",
+                **dict(zip(TICK_FIELDS, values))
+            )
+            ticks.append(tick)
+
+        return ticks
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> Sequence[BarData]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        table = self.read_table(folder, BAR_SCHEMA, start, end)
+        return self.to_bars(table, symbol, exchange, interval)
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> Sequence[TickData]:
+        folder = self.get_tick_folder(symbol, exchange)
+        table = self.read_table(folder, TICK_SCHEMA, start, end)
+        return self.to_ticks(table, symbol, exchange)
+
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[BarData]]:
+        """
+        Read month by month, so that only one month of rows is held in memory.
+        """
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        start = to_db_datetime(start)
+        end = to_db_datetime(end)
+
+        for path in self.get_file_paths(folder, start, end):
+            table = pq.read_table(
+                path,
+                filters=[("datetime", ">=", start), ("datetime", "<=", end)],
+                schema=BAR_SCHEMA
+            )
+            for batch in table.to_batches(chunk_size):
+                yield self.to_bars(batch, symbol, exchange, interval)
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[TickData]]:
+        """
+        Read month by month, so that only one month of rows is held in memory.
+        """
+        folder = self.get_tick_folder(symbol, exchange)
+        start = to_db_datetime(start)
+        end = to_db_datetime(end)
+
+        for path in self.get_file_paths(folder, start, end):
+            table = pq.read_table(
+                path,
+                filters=[("datetime", ">=", start), ("datetime", "<=", end)],
+                schema=TICK_SCHEMA
+            )
+            for batch in table.to_batches(chunk_size):
+                yield self.to_ticks(batch, symbol, exchange)
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarArray:
+        """
+        Copy columns into bar array directly without creating BarData.
+        """
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        table = self.read_table(folder, BAR_SCHEMA, start, end)
+
+        data = np.empty(table.num_rows, dtype=BAR_DTYPE)
+
+        timestamps = table.column("datetime").to_numpy().view(np.int64)
+        utc_timestamps, _ = localize_timestamps(timestamps)
+        data["datetime"] = utc_timestamps.view("datetime64[us]")
+
+        for name in BAR_FIELDS:
+            data[name] = table.column(name).to_numpy()
+
+        return BarArray(data, symbol, exchange, interval, DB_TZ)
+
+    def save_bar_data(self, datas: Sequence[BarData]):
+        groups: Dict[tuple, List[BarData]] = {}
+        for bar in datas:
+            key = (bar.symbol, bar.exchange, bar.interval)
+            groups.setdefault(key, []).append(bar)
+
+        for key, bars in groups.items():
+            columns = {"datetime": [to_db_datetime(bar.datetime) for bar in bars]}
+            for name in BAR_FIELDS:
+                columns[name] = [getattr(bar, name) for bar in bars]
+
+            table = pa.table(columns, schema=BAR_SCHEMA)
+            self.save_table(self.get_bar_folder(*key), table, BAR_SCHEMA)
+
+    def save_tick_data(self, datas: Sequence[TickData]):
+        groups: Dict[tuple, List[TickData]] = {}
+        for tick in datas:
+            key = (tick.symbol, tick.exchange)
+            groups.setdefault(key, []).append(tick)
+
+        for key, ticks in groups.items():
+            columns = {
+                "datetime": [to_db_datetime(tick.datetime) for tick in ticks],
+                "name": [tick.name for tick in ticks],
+            }
+            for name in TICK_FIELDS:
+                columns[name] = [getattr(tick, name) for tick in ticks]
+
+            table = pa.table(columns, schema=TICK_SCHEMA)
+            self.save_table(self.get_tick_folder(*key), table, TICK_SCHEMA)
+
+    def get_newest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        paths = self.get_file_paths(folder)
+        if not paths:
+            return None
+
+        table = pq.read_table(paths[-1], schema=BAR_SCHEMA)
+        bars = self.to_bars(table.slice(table.num_rows - 1), symbol, exchange, interval)
+        return bars[0] if bars else None
+
+    def get_oldest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        paths = self.get_file_paths(folder)
+        if not paths:
+            return None
+
+        table = pq.read_table(paths[0], schema=BAR_SCHEMA)
+        bars = self.to_bars(table.slice(0, 1), symbol, exchange, interval)
+        return bars[0] if bars else None
+
+    def get_newest_tick_data(
+        self, symbol: str, exchange: "Exchange"
+    ) -> Optional["TickData"]:
+        folder = self.get_tick_folder(symbol, exchange)
+        paths = self.get_file_paths(folder)
+        if not paths:
+            return None
+
+        table = pq.read_table(paths[-1], schema=TICK_SCHEMA)
+        ticks = self.to_ticks(table.slice(table.num_rows - 1), symbol, exchange)
+        return ticks[0] if ticks else None
+
+    def get_bar_data_statistics(self) -> List:
+        """
+        Row counts are read from file metadata without loading data.
+        """
+        r = []
+
+        for folder in sorted(self.root.glob("bar/*/*/*")):
+            paths = self.get_file_paths(folder)
+            if not paths:
+                continue
+
+            count = sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+            r.append({
+                "symbol": folder.parent.name,
+                "exchange": folder.parent.parent.name,
+                "interval": folder.name,
+                "count": count
+            })
+
+        return r
+
+    def delete_bar_data(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval"
+    ) -> int:
+        """
+        Delete all bar data with given symbol + exchange + interval.
+        """
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        paths = self.get_file_paths(folder)
+
+        count = sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+
+        if folder.exists():
+            shutil.rmtree(folder)
+
+        return count
+
+    def clean(self, symbol: str):
+        for folder in self.root.glob(f"bar/*/{symbol}"):
+            shutil.rmtree(folder)
+
+        for folder in self.root.glob(f"tick/*/{symbol}"):
+            shutil.rmtree(folder)
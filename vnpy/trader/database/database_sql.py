@@ -1,6 +1,6 @@
 """"""
 from datetime import datetime
-from typing import List, Dict, Optional, Sequence, Type
+from typing import List, Dict, Optional, Sequence, Type, Iterator
 
 from peewee import (
     AutoField,
@@ -20,7 +20,7 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import get_file_path
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import BaseDatabaseManager, Driver, DB_TZ, DB_BAR_CLASS, DB_TICK_CLASS
 
 
 def init(driver: Driver, settings: dict):
@@ -32,7 +32,8 @@ def init(driver: Driver, settings: dict):
     assert driver in init_funcs
 
     db = init_funcs[driver](settings)
-    bar, tick = init_models(db, driver)
+    chunk_size = settings.get("chunk_size", 50)
+    bar, tick = init_models(db, driver, chunk_size)
     return SqlManager(bar, tick)
 
 
@@ -63,7 +64,35 @@ class ModelBase(Model):
         return self.__data__
 
 
-def init_models(db: Database, driver: Driver):
+def get_value_fields(model: Type[Model], conflict_target: tuple) -> list:
+    """
+    Get fields to be updated with new values when insert conflicts.
+    """
+    key_names = {field.name for field in conflict_target}
+    key_names.add(model._meta.primary_key.name)
+
+    return [
+        field for field in model._meta.sorted_fields
+        if field.name not in key_names
+    ]
+
+
+def remove_duplicates(dicts: List[dict], conflict_target: tuple) -> List[dict]:
+    """
+    Keep only the last row of each key, since PostgreSQL cannot update
+    the same row twice within one insert statement.
+    """
+    key_names = [field.name for field in conflict_target]
+
+    rows = {}
+    for d in dicts:
+        key = tuple(d[name] for name in key_names)
+        rows[key] = d
+
+    return list(rows.values())
+
+
+def init_models(db: Database, driver: Driver, chunk_size: int = 50):
     class DbBarData(ModelBase):
         """
         Candlestick bar data for database storage.
@@ -117,7 +146,7 @@ def init_models(db: Database, driver: Driver):
             """
             Generate BarData object from DbBarData.
             """
-            bar = BarData(
+            bar = DB_BAR_CLASS(
                 symbol=self.symbol,
                 exchange=Exchange(self.exchange),
                 datetime=DB_TZ.localize(self.datetime),
@@ -140,18 +169,22 @@ def init_models(db: Database, driver: Driver):
             dicts = [i.to_dict() for i in objs]
             with db.atomic():
                 if driver is Driver.POSTGRESQL:
-                    for bar in dicts:
-                        DbBarData.insert(bar).on_conflict(
-                            update=bar,
-                            conflict_target=(
-                                DbBarData.symbol,
-                                DbBarData.exchange,
-                                DbBarData.interval,
-                                DbBarData.datetime,
-                            ),
+                    conflict_target = (
+                        DbBarData.symbol,
+                        DbBarData.exchange,
+                        DbBarData.interval,
+                        DbBarData.datetime,
+                    )
+                    preserve = get_value_fields(DbBarData, conflict_target)
+                    dicts = remove_duplicates(dicts, conflict_target)
+
+                    for c in chunked(dicts, chunk_size):
+                        DbBarData.insert_many(c).on_conflict(
+                            conflict_target=conflict_target,
+                            preserve=preserve,
                         ).execute()
                 else:
-                    for c in chunked(dicts, 50):
+                    for c in chunked(dicts, chunk_size):
                         DbBarData.insert_many(
                             c).on_conflict_replace().execute()
 
@@ -268,7 +301,7 @@ def init_models(db: Database, driver: Driver):
             """
             Generate TickData object from DbTickData.
             """
-            tick = TickData(
+            tick = DB_TICK_CLASS(
                 symbol=self.symbol,
                 exchange=Exchange(self.exchange),
                 datetime=DB_TZ.localize(self.datetime),
@@ -318,17 +351,21 @@ def init_models(db: Database, driver: Driver):
             dicts = [i.to_dict() for i in objs]
             with db.atomic():
                 if driver is Driver.POSTGRESQL:
-                    for tick in dicts:
-                        DbTickData.insert(tick).on_conflict(
-                            update=tick,
-                            conflict_target=(
-                                DbTickData.symbol,
-                                DbTickData.exchange,
-                                DbTickData.datetime,
-                            ),
+                    conflict_target = (
+                        DbTickData.symbol,
+                        DbTickData.exchange,
+                        DbTickData.datetime,
+                    )
+                    preserve = get_value_fields(DbTickData, conflict_target)
+                    dicts = remove_duplicates(dicts, conflict_target)
+
+                    for c in chunked(dicts, chunk_size):
+                        DbTickData.insert_many(c).on_conflict(
+                            conflict_target=conflict_target,
+                            preserve=preserve,
                         ).execute()
                 else:
-                    for c in chunked(dicts, 50):
+                    for c in chunked(dicts, chunk_size):
                         DbTickData.insert_many(c).on_conflict_replace().execute()
 
     db.connect()
@@ -382,6 +419,90 @@ class SqlManager(BaseDatabaseManager):
         data = [db_tick.to_tick() for db_tick in s]
         return data
 
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[BarData]]:
+        """
+        Query bar data page by page with datetime as key of each page,
+        so that only one chunk of rows is held in memory.
+        """
+        condition = (
+            (self.class_bar.symbol == symbol)
+            & (self.class_bar.exchange == exchange.value)
+            & (self.class_bar.interval == interval.value)
+            & (self.class_bar.datetime <= end)
+        )
+
+        last_dt = start
+        where = condition & (self.class_bar.datetime >= last_dt)
+
+        while True:
+            s = (
+                self.class_bar.select()
+                .where(where)
+                .order_by(self.class_bar.datetime)
+                .limit(chunk_size)
+            )
+
+            db_bars = list(s)
+            if not db_bars:
+                break
+
+            yield [db_bar.to_bar() for db_bar in db_bars]
+
+            if len(db_bars) < chunk_size:
+                break
+
+            last_dt = db_bars[-1].datetime
+            where = condition & (self.class_bar.datetime > last_dt)
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 10000
+    ) -> Iterator[List[TickData]]:
+        """
+        Query tick data page by page with datetime as key of each page,
+        so that only one chunk of rows is held in memory.
+        """
+        condition = (
+            (self.class_tick.symbol == symbol)
+            & (self.class_tick.exchange == exchange.value)
+            & (self.class_tick.datetime <= end)
+        )
+
+        last_dt = start
+        where = condition & (self.class_tick.datetime >= last_dt)
+
+        while True:
+            s = (
+                self.class_tick.select()
+                .where(where)
+                .order_by(self.class_tick.datetime)
+                .limit(chunk_size)
+            )
+
+            db_ticks = list(s)
+            if not db_ticks:
+                break
+
+            yield [db_tick.to_tick() for db_tick in db_ticks]
+
+            if len(db_ticks) < chunk_size:
+                break
+
+            last_dt = db_ticks[-1].datetime
+            where = condition & (self.class_tick.datetime > last_dt)
+
     def save_bar_data(self, datas: Sequence[BarData]):
         ds = [self.class_bar.from_bar(i) for i in datas]
         self.class_bar.save_all(ds)
@@ -0,0 +1,540 @@
+"""
+Memory mapped binary files of bar and tick data.
+
+Records of each symbol-day are stored in one file as numpy structured
+array (BAR_DTYPE/TICK_DTYPE) with UTC timestamp, and days stored are
+listed in the index file of the same folder:
+    bar/{exchange}/{symbol}/{interval}/{YYYYMMDD}.bin
+    tick/{exchange}/{symbol}/{YYYYMMDD}.bin
+
+Files are read with np.memmap, so loading the same period again only maps
+pages already in OS page cache, which are also shared by all processes of
+optimization.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import (
+    BAR_DTYPE,
+    TICK_DTYPE,
+    TICK_FIELDS,
+    TEMP_DIR,
+    BarArray
+)
+
+from . import database_manager
+from .database import DB_TZ
+
+
+INDEX_DTYPE = np.dtype([("date", "datetime64[D]"), ("count", "i8")])
+INDEX_NAME = "index.bin"
+SOURCE_NAME = "source.json"
+FILE_SUFFIX = ".bin"
+
+HOUR_US = 3_600_000_000
+DAY_US = 24 * HOUR_US
+UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_timestamp(dt: datetime) -> int:
+    """
+    Convert datetime into UTC timestamp in microseconds, naive datetime
+    is taken as database timezone.
+    """
+    if not dt.tzinfo:
+        dt = DB_TZ.localize(dt)
+    return round(dt.timestamp() * 1_000_000)
+
+
+def get_hour_bases(timestamps: np.ndarray) -> Tuple[List[datetime], np.ndarray]:
+    """
+    Get local datetime of UTC epoch for each hour of timestamps, adding
+    timestamp to which gives local datetime.
+
+    Timezone is only looked up once for each hour.
+    """
+    hours = timestamps // HOUR_US
+    unique_hours, inverse = np.unique(hours, return_inverse=True)
+
+    bases = []
+    for hour in unique_hours.tolist():
+        local_hour = (UTC_EPOCH + timedelta(hours=hour)).astimezone(DB_TZ)
+        bases.append(local_hour - timedelta(hours=hour))
+
+    return bases, inverse
+
+
+def get_local_dates(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Get date in database timezone of each UTC timestamp.
+    """
+    bases, inverse = get_hour_bases(timestamps)
+
+    offsets = np.array(
+        [base.utcoffset() // timedelta(microseconds=1) for base in bases],
+        dtype=np.int64
+    )
+    local_timestamps = timestamps + offsets[inverse]
+
+    return (local_timestamps // DAY_US).astype("datetime64[D]")
+
+
+def convert_timestamps(timestamps: np.ndarray) -> List[datetime]:
+    """
+    Convert UTC timestamps into datetime of database timezone.
+    """
+    bases, inverse = get_hour_bases(timestamps)
+
+    return [
+        bases[ix] + timedelta(microseconds=timestamp)
+        for ix, timestamp in zip(inverse.tolist(), timestamps.tolist())
+    ]
+
+
+def remove_duplicates(records: np.ndarray) -> np.ndarray:
+    """
+    Sort records by datetime and keep the last one of each datetime.
+    """
+    reversed_records = records[::-1]
+    _, ix = np.unique(reversed_records["datetime"], return_index=True)
+    return reversed_records[ix]
+
+
+def get_days(start: datetime, end: datetime) -> np.ndarray:
+    """
+    Get dates from start to end (inclusive) in database timezone.
+    """
+    timestamps = np.array([to_timestamp(start), to_timestamp(end)], dtype=np.int64)
+    start_date, end_date = get_local_dates(timestamps)
+    return np.arange(start_date, end_date + 1)
+
+
+def get_today() -> date:
+    """
+    Get today in database timezone, days before which are closed.
+    """
+    return datetime.now(DB_TZ).date()
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Change datetime to database timezone without tzinfo.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt
+
+
+def get_day_start(day: date) -> datetime:
+    """"""
+    return datetime.combine(day, datetime.min.time())
+
+
+def get_day_end(day: date) -> datetime:
+    """"""
+    return datetime.combine(day, datetime.max.time())
+
+
+def to_tick_records(ticks: Sequence[TickData]) -> np.ndarray:
+    """"""
+    records = np.empty(len(ticks), dtype=TICK_DTYPE)
+    records["datetime"] = [to_timestamp(tick.datetime) for tick in ticks]
+    for name in TICK_FIELDS:
+        records[name] = [getattr(tick, name) for tick in ticks]
+    return records
+
+
+class DataFileStore:
+    """
+    Store of bar and tick data in memory mapped binary files.
+
+    Only closed days (before today) loaded from database are added into
+    index, and data of days not in index is always loaded from database.
+    Data written by data recorder is merged into day files but never
+    makes a day regarded as stored.
+
+    Oldest/newest datetime in database is recorded when days are stored,
+    and stored days which may be changed by later saving or deleting in
+    database are dropped once these datetimes change. Data inserted into
+    database between the recorded oldest/newest is not detected.
+    """
+
+    def __init__(self, root: Path):
+        """"""
+        self.root: Path = root
+
+    def get_bar_folder(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Path:
+        """"""
+        return self.root.joinpath("bar", exchange.value, symbol, interval.value)
+
+    def get_tick_folder(self, symbol: str, exchange: Exchange) -> Path:
+        """"""
+        return self.root.joinpath("tick", exchange.value, symbol)
+
+    def get_file_path(self, folder: Path, day: date) -> Path:
+        """"""
+        return folder.joinpath(day.strftime("%Y%m%d") + FILE_SUFFIX)
+
+    def load_index(self, folder: Path) -> Dict[date, int]:
+        """
+        Load record count of each day stored.
+        """
+        path = folder.joinpath(INDEX_NAME)
+        if not path.exists():
+            return {}
+
+        index = np.fromfile(path, dtype=INDEX_DTYPE)
+        return dict(zip(index["date"].tolist(), index["count"].tolist()))
+
+    def save_index(self, folder: Path, counts: Dict[date, int]) -> None:
+        """"""
+        index = np.array(sorted(counts.items()), dtype=INDEX_DTYPE)
+        self.write_file(folder.joinpath(INDEX_NAME), index)
+
+    def write_file(self, path: Path, records: np.ndarray) -> None:
+        """
+        Write into temp file first, so that readers never see a half
+        written file. Existing memory maps keep the old file content.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        records.tofile(temp_path)
+        os.replace(temp_path, path)
+
+    def write_day(self, path: Path, records: np.ndarray) -> int:
+        """
+        Write records of one day and return record count of the day file.
+        """
+        records = remove_duplicates(records)
+
+        if path.exists():
+            dtype = records.dtype
+            count = path.stat().st_size // dtype.itemsize
+
+            if count:
+                last = np.fromfile(
+                    path,
+                    dtype=dtype,
+                    count=1,
+                    offset=(count - 1) * dtype.itemsize
+                )
+
+                # Append new records directly, which is the case of recording
+                if records["datetime"][0] > last["datetime"][0]:
+                    with open(path, "ab") as f:
+                        f.write(records.tobytes())
+                    return count + len(records)
+
+                existing = np.fromfile(path, dtype=dtype)
+                records = remove_duplicates(np.concatenate([existing, records]))
+
+        self.write_file(path, records)
+        return len(records)
+
+    def write_records(
+        self,
+        folder: Path,
+        records: np.ndarray,
+        days: List[date] = None
+    ) -> None:
+        """
+        Write records into day files. Days given are added into index even
+        if there is no record (e.g. holidays).
+        """
+        counts = self.load_index(folder)
+        days = set(days or [])
+
+        if len(records):
+            timestamps = records["datetime"].view(np.int64)
+            dates = get_local_dates(timestamps)
+
+            for day in np.unique(dates):
+                day_records = records[dates == day]
+                day = day.item()
+
+                path = self.get_file_path(folder, day)
+                count = self.write_day(path, day_records)
+
+                if day in days or day in counts:
+                    counts[day] = count
+                days.discard(day)
+
+        # Days without record in database
+        for day in days:
+            path = self.get_file_path(folder, day)
+            if path.exists():
+                path.unlink()
+            counts[day] = 0
+
+        self.save_index(folder, counts)
+
+    def read_records(
+        self,
+        folder: Path,
+        dtype: np.dtype,
+        start: datetime,
+        end: datetime
+    ) -> Optional[List[np.ndarray]]:
+        """
+        Get memory mapped views of records within start/end for each day.
+
+        Return None if any day is not stored.
+        """
+        counts = self.load_index(folder)
+        days = get_days(start, end).tolist()
+
+        if any(day not in counts for day in days):
+            return None
+
+        start_dt = np.datetime64(to_timestamp(start), "us")
+        end_dt = np.datetime64(to_timestamp(end), "us")
+
+        views = []
+        for day in days:
+            if not counts[day]:
+                continue
+
+            path = self.get_file_path(folder, day)
+            records = np.memmap(path, dtype=dtype, mode="r")
+
+            datetimes = records["datetime"]
+            left = np.searchsorted(datetimes, start_dt, "left")
+            right = np.searchsorted(datetimes, end_dt, "right")
+
+            if right > left:
+                views.append(records[left:right])
+
+        return views
+
+    def check_source(
+        self,
+        folder: Path,
+        oldest: Optional[datetime],
+        newest: Optional[datetime]
+    ) -> None:
+        """
+        Drop stored days which may be changed in database since stored,
+        by comparing oldest/newest datetime of data in database.
+        """
+        source = [
+            to_timestamp(oldest) if oldest else None,
+            to_timestamp(newest) if newest else None
+        ]
+
+        path = folder.joinpath(SOURCE_NAME)
+        if path.exists():
+            with open(path) as f:
+                stored = json.load(f)
+        else:
+            stored = None
+
+        if stored == source:
+            return
+
+        counts = self.load_index(folder)
+
+        # All days are dropped if data deleted or never recorded
+        if not stored or stored[1] is None or source[1] is None:
+            dropped = list(counts)
+        else:
+            timestamps = [stored[1], source[1]]
+            if stored[0] is not None and source[0] is not None:
+                timestamps.extend([stored[0], source[0]])
+
+            dates = get_local_dates(np.array(timestamps, dtype=np.int64)).tolist()
+            newest_date = min(dates[:2])
+            oldest_date = max(dates[2:]) if len(dates) > 2 else None
+
+            dropped = [
+                day for day in counts
+                if day >= newest_date or (oldest_date and day <= oldest_date)
+            ]
+
+        for day in dropped:
+            counts.pop(day)
+
+            day_path = self.get_file_path(folder, day)
+            if day_path.exists():
+                day_path.unlink()
+
+        self.save_index(folder, counts)
+
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(source, f)
+        os.replace(temp_path, path)
+
+    def load_records(
+        self,
+        folder: Path,
+        dtype: np.dtype,
+        start: datetime,
+        end: datetime,
+        load_func: Callable[[datetime, datetime], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Load records within start/end. Closed days are read from files,
+        and saved from database first if not stored yet. Days not closed
+        are always loaded from database.
+        """
+        start = to_db_datetime(start)
+        end = to_db_datetime(end)
+
+        today = get_today()
+        days = get_days(start, end).tolist()
+        closed_days = [day for day in days if day < today]
+
+        arrays = [np.empty(0, dtype=dtype)]
+
+        if closed_days:
+            counts = self.load_index(folder)
+            missing = [day for day in closed_days if day not in counts]
+
+            if missing:
+                records = load_func(get_day_start(missing[0]), get_day_end(missing[-1]))
+                self.write_records(folder, records, missing)
+
+            closed_end = min(end, get_day_end(closed_days[-1]))
+            arrays.extend(self.read_records(folder, dtype, start, closed_end))
+
+        if days[-1] >= today:
+            arrays.append(load_func(max(start, get_day_start(today)), end))
+
+        if len(arrays) == 2:
+            return arrays[1]
+        return np.concatenate(arrays)
+
+    def save_bar_data(self, bars: Sequence[BarData]) -> None:
+        """"""
+        groups: Dict[tuple, List[BarData]] = {}
+        for bar in bars:
+            key = (bar.symbol, bar.exchange, bar.interval)
+            groups.setdefault(key, []).append(bar)
+
+        for key, key_bars in groups.items():
+            records = BarArray.from_bars(key_bars, *key).data
+            self.write_records(self.get_bar_folder(*key), records)
+
+    def save_tick_data(self, ticks: Sequence[TickData]) -> None:
+        """"""
+        groups: Dict[tuple, List[TickData]] = {}
+        for tick in ticks:
+            key = (tick.symbol, tick.exchange)
+            groups.setdefault(key, []).append(tick)
+
+        for key, key_ticks in groups.items():
+            records = to_tick_records(key_ticks)
+            self.write_records(self.get_tick_folder(*key), records)
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarArray:
+        """
+        Load bar data without copying if within one closed day.
+        """
+        folder = self.get_bar_folder(symbol, exchange, interval)
+
+        oldest_bar = database_manager.get_oldest_bar_data(symbol, exchange, interval)
+        newest_bar = database_manager.get_newest_bar_data(symbol, exchange, interval)
+        self.check_source(
+            folder,
+            oldest_bar.datetime if oldest_bar else None,
+            newest_bar.datetime if newest_bar else None
+        )
+
+        def load_func(load_start: datetime, load_end: datetime) -> np.ndarray:
+            """"""
+            bars = database_manager.load_bar_data(
+                symbol, exchange, interval, load_start, load_end
+            )
+            return BarArray.from_bars(bars, symbol, exchange, interval).data
+
+        data = self.load_records(folder, BAR_DTYPE, start, end, load_func)
+        return BarArray(data, symbol, exchange, interval, DB_TZ)
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> List[BarData]:
+        """"""
+        return list(self.load_bar_array(symbol, exchange, interval, start, end))
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> List[TickData]:
+        """
+        Name of tick is not stored in data files.
+        """
+        folder = self.get_tick_folder(symbol, exchange)
+
+        newest_tick = database_manager.get_newest_tick_data(symbol, exchange)
+        self.check_source(
+            folder,
+            None,
+            newest_tick.datetime if newest_tick else None
+        )
+
+        def load_func(load_start: datetime, load_end: datetime) -> np.ndarray:
+            """"""
+            ticks = database_manager.load_tick_data(
+                symbol, exchange, load_start, load_end
+            )
+            return to_tick_records(ticks)
+
+        records = self.load_records(folder, TICK_DTYPE, start, end, load_func)
+
+        datetimes = convert_timestamps(records["datetime"].view(np.int64))
+        columns = [records[name].tolist() for name in TICK_FIELDS]
+
+        ticks = []
+
+        for dt, values in zip(datetimes, zip(*columns)):
+            tick = TickData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                gateway_name="DB",
+                **dict(zip(TICK_FIELDS, values))
+            )
+            ticks.append(tick)
+
+        return ticks
+
+
+datafile_store = DataFileStore(TEMP_DIR.joinpath(SETTINGS["datafile.folder"]))
+
+
+def get_backtesting_source():
+    """
+    Get data files store if enabled for backtesting, otherwise database manager.
+    """
+    if SETTINGS["datafile.backtesting"]:
+        return datafile_store
+    return database_manager
@@ -8,13 +8,15 @@ def init(settings: dict) -> BaseDatabaseManager:
         return init_mongo(driver=driver, settings=settings)
     elif driver is Driver.INFLUX:
         return init_influx(driver=driver, settings=settings)
+    elif driver is Driver.PARQUET:
+        return init_parquet(driver=driver, settings=settings)
     else:
         return init_sql(driver=driver, settings=settings)
 
 
 def init_sql(driver: Driver, settings: dict):
     from .database_sql import init
-    keys = {'database', "host", "port", "user", "password"}
+    keys = {'database', "host", "port", "user", "password", "chunk_size"}
     settings = {k: v for k, v in settings.items() if k in keys}
     _database_manager = init(driver, settings)
     return _database_manager
@@ -30,3 +32,9 @@ def init_influx(driver: Driver, settings: dict):
     from .database_influx import init
     _database_manager = init(driver, settings=settings)
     return _database_manager
+
+
+def init_parquet(driver: Driver, settings: dict):
+    from .database_parquet import init
+    _database_manager = init(driver, settings=settings)
+    return _database_manager
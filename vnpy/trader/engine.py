@@ -21,7 +21,8 @@ from .event import (
     EVENT_POSITION,
     EVENT_ACCOUNT,
     EVENT_CONTRACT,
-    EVENT_LOG
+    EVENT_LOG,
+    EVENT_PRIORITIES
 )
 from .gateway import BaseGateway
 from .object import (
@@ -40,6 +41,7 @@ from .object import (
     Exchange
 )
 from .setting import SETTINGS
+from .registry import symbol_registry
 from .utility import get_folder_path, TRADER_DIR
 
 
@@ -53,7 +55,17 @@ class MainEngine:
         if event_engine:
             self.event_engine: EventEngine = event_engine
         else:
-            self.event_engine = EventEngine()
+            if SETTINGS["event.priority_lanes"]:
+                priorities = EVENT_PRIORITIES
+            else:
+                priorities = None
+
+            self.event_engine = EventEngine(
+                topic_dispatch=SETTINGS["event.topic_dispatch"],
+                worker_count=SETTINGS["event.worker_count"],
+                monitor_interval=SETTINGS["event.monitor_interval"],
+                priorities=priorities
+            )
         self.event_engine.start()
 
         self.gateways: Dict[str, BaseGateway] = {}
@@ -364,6 +376,7 @@ class OmsEngine(BaseEngine):
         self.main_engine.get_all_accounts = self.get_all_accounts
         self.main_engine.get_all_contracts = self.get_all_contracts
         self.main_engine.get_all_active_orders = self.get_all_active_orders
+        self.main_engine.get_symbol_id = symbol_registry.get_symbol_id
 
     def register_event(self) -> None:
         """"""
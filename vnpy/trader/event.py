@@ -2,6 +2,8 @@
 Event type string used in VN Trader.
 """
 
+from vnpy.event import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
 # 定时器事件
 EVENT_TIMER = "eTimer"
 
@@ -35,3 +37,21 @@ EVENT_ALGO_PARAMETERS = "eAlgoParameters"
 # 股票交易相关事件
 EVENT_EQUITY_LOG = "eEquityLog"
 EVENT_EQUITY_STRATEGY = "eEquityStrategy"
+
+# 事件优先级（启用event.priority_lanes时生效）
+EVENT_PRIORITIES = {
+    EVENT_ORDER: PRIORITY_HIGH,
+    EVENT_TRADE: PRIORITY_HIGH,
+    EVENT_POSITION: PRIORITY_HIGH,
+    EVENT_ACCOUNT: PRIORITY_HIGH,
+    EVENT_CTA_STOPORDER: PRIORITY_HIGH,
+    EVENT_TICK: PRIORITY_NORMAL,
+    EVENT_CONTRACT: PRIORITY_NORMAL,
+    EVENT_TIMER: PRIORITY_LOW,
+    EVENT_LOG: PRIORITY_LOW,
+    EVENT_CTA_LOG: PRIORITY_LOW,
+    EVENT_RECORDER_LOG: PRIORITY_LOW,
+    EVENT_DB_LOG: PRIORITY_LOW,
+    EVENT_ALGO_LOG: PRIORITY_LOW,
+    EVENT_EQUITY_LOG: PRIORITY_LOW,
+}
@@ -95,40 +95,35 @@ class BaseGateway(ABC):
         Tick event push.
         Tick event of a specific vt_symbol is also pushed.
         """
-        self.on_event(EVENT_TICK, tick)
-        self.on_event(EVENT_TICK + tick.vt_symbol, tick)
+        self.event_engine.publish(EVENT_TICK, tick, tick.vt_symbol)
 
     def on_trade(self, trade: TradeData) -> None:
         """
         Trade event push.
         Trade event of a specific vt_symbol is also pushed.
         """
-        self.on_event(EVENT_TRADE, trade)
-        self.on_event(EVENT_TRADE + trade.vt_symbol, trade)
+        self.event_engine.publish(EVENT_TRADE, trade, trade.vt_symbol)
 
     def on_order(self, order: OrderData) -> None:
         """
         Order event push.
         Order event of a specific vt_orderid is also pushed.
         """
-        self.on_event(EVENT_ORDER, order)
-        self.on_event(EVENT_ORDER + order.vt_orderid, order)
+        self.event_engine.publish(EVENT_ORDER, order, order.vt_orderid)
 
     def on_position(self, position: PositionData) -> None:
         """
         Position event push.
         Position event of a specific vt_symbol is also pushed.
         """
-        self.on_event(EVENT_POSITION, position)
-        self.on_event(EVENT_POSITION + position.vt_symbol, position)
+        self.event_engine.publish(EVENT_POSITION, position, position.vt_symbol)
 
     def on_account(self, account: AccountData) -> None:
         """
         Account event push.
         Account event of a specific vt_accountid is also pushed.
         """
-        self.on_event(EVENT_ACCOUNT, account)
-        self.on_event(EVENT_ACCOUNT + account.vt_accountid, account)
+        self.event_engine.publish(EVENT_ACCOUNT, account, account.vt_accountid)
 
     def on_log(self, log: LogData) -> None:
         """
@@ -2,11 +2,12 @@
 Basic data structure used for general trading function in VN Trader.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
 from logging import INFO
 
 from .constant import Direction, Exchange, Interval, Offset, Status, Product, OptionType, OrderType
+from .registry import symbol_registry
 
 ACTIVE_STATUSES = set([Status.SUBMITTING, Status.NOTTRADED, Status.PARTTRADED])
 
@@ -73,7 +74,7 @@ class TickData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -96,7 +97,37 @@ class BarData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
+
+
+def create_slot_class(cls: type) -> type:
+    """
+    Create a variant of data class using __slots__ instead of __dict__,
+    with the same fields and methods, and interned vt_symbol.
+    """
+    names = tuple(f.name for f in fields(cls))
+
+    namespace = {}
+    for key, value in cls.__dict__.items():
+        if key not in names and key not in {"__dict__", "__weakref__"}:
+            namespace[key] = value
+
+    def __post_init__(self):
+        """"""
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
+
+    name = "Slot" + cls.__name__
+    namespace["__slots__"] = names + ("vt_symbol",)
+    namespace["__post_init__"] = __post_init__
+    namespace["__qualname__"] = name
+
+    return type(name, (object,), namespace)
+
+
+# Compact variants without per-instance __dict__, for loading large
+# amount of history data.
+SlotTickData = create_slot_class(TickData)
+SlotBarData = create_slot_class(BarData)
 
 
 @dataclass
@@ -122,8 +153,8 @@ class OrderData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
-        self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
+        self.vt_orderid = symbol_registry.get_vt_id(self.gateway_name, self.orderid)
 
     def is_active(self) -> bool:
         """
@@ -164,8 +195,8 @@ class TradeData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
-        self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
+        self.vt_orderid = symbol_registry.get_vt_id(self.gateway_name, self.orderid)
         self.vt_tradeid = f"{self.gateway_name}.{self.tradeid}"
 
 
@@ -187,8 +218,8 @@ class PositionData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
-        self.vt_positionid = f"{self.vt_symbol}.{self.direction.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
+        self.vt_positionid = symbol_registry.get_vt_positionid(self.vt_symbol, self.direction)
 
 
 @dataclass
@@ -206,7 +237,7 @@ class AccountData(BaseData):
     def __post_init__(self):
         """"""
         self.available = self.balance - self.frozen
-        self.vt_accountid = f"{self.gateway_name}.{self.accountid}"
+        self.vt_accountid = symbol_registry.get_vt_id(self.gateway_name, self.accountid)
 
 
 @dataclass
@@ -250,7 +281,7 @@ class ContractData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -264,7 +295,7 @@ class SubscribeRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -284,7 +315,7 @@ class OrderRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
 
     def create_order_data(self, orderid: str, gateway_name: str) -> OrderData:
         """
@@ -317,7 +348,7 @@ class CancelRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -334,4 +365,4 @@ class HistoryRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = symbol_registry.get_vt_symbol(self.symbol, self.exchange)
@@ -0,0 +1,89 @@
+"""
+Registry of identifier strings used in VN Trader.
+"""
+
+from typing import Dict, Tuple
+
+from .constant import Direction, Exchange
+
+# Ids of each gateway are cleared when exceeding this count, so that
+# backtesting with millions of orders does not keep them all. Strings
+# created after clearing are equal to old ones, so nothing is broken.
+MAX_ID_COUNT = 100_000
+
+
+class SymbolRegistry:
+    """
+    Hands out one shared string for each vt_symbol, vt_orderid, etc.
+
+    Data objects of the same symbol/order then hold the same string
+    object, so no new string is formatted for each update, and dict
+    lookup with them hits on identity with cached hash.
+    """
+
+    def __init__(self):
+        """"""
+        # symbol: (exchange, vt_symbol) for the first exchange seen,
+        # which avoids hashing exchange enum on fast path
+        self.symbol_map: Dict[str, Tuple[Exchange, str]] = {}
+        self.vt_symbols: Dict[Tuple[str, Exchange], str] = {}
+
+        self.symbol_ids: Dict[str, int] = {}
+        self.gateway_ids: Dict[str, Dict[str, str]] = {}
+        self.vt_positionids: Dict[Tuple[str, Direction], str] = {}
+
+    def get_vt_symbol(self, symbol: str, exchange: Exchange) -> str:
+        """"""
+        item = self.symbol_map.get(symbol, None)
+        if item and item[0] is exchange:
+            return item[1]
+
+        key = (symbol, exchange)
+        vt_symbol = self.vt_symbols.get(key, None)
+        if not vt_symbol:
+            vt_symbol = f"{symbol}.{exchange.value}"
+            self.vt_symbols[key] = vt_symbol
+            self.symbol_ids[vt_symbol] = len(self.symbol_ids)
+
+        if symbol not in self.symbol_map:
+            self.symbol_map[symbol] = (exchange, vt_symbol)
+
+        return vt_symbol
+
+    def get_symbol_id(self, vt_symbol: str) -> int:
+        """
+        Get small integer id of vt_symbol, -1 if not registered.
+        """
+        return self.symbol_ids.get(vt_symbol, -1)
+
+    def get_vt_id(self, gateway_name: str, id: str) -> str:
+        """
+        Get identifier in gateway_name.id format (vt_orderid, vt_accountid).
+        """
+        ids = self.gateway_ids.get(gateway_name, None)
+        if ids is None:
+            ids = self.gateway_ids.setdefault(gateway_name, {})
+
+        vt_id = ids.get(id, None)
+        if not vt_id:
+            if len(ids) >= MAX_ID_COUNT:
+                ids.clear()
+
+            vt_id = f"{gateway_name}.{id}"
+            ids[id] = vt_id
+
+        return vt_id
+
+    def get_vt_positionid(self, vt_symbol: str, direction: Direction) -> str:
+        """"""
+        key = (vt_symbol, direction)
+
+        vt_positionid = self.vt_positionids.get(key, None)
+        if not vt_positionid:
+            vt_positionid = f"{vt_symbol}.{direction.value}"
+            self.vt_positionids[key] = vt_positionid
+
+        return vt_positionid
+
+
+symbol_registry: SymbolRegistry = SymbolRegistry()
@@ -1,8 +1,9 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from typing import List, Optional
 from pytz import timezone
 
 from numpy import ndarray
+from pandas import DataFrame
 from rqdatac import init as rqdata_init
 from rqdatac.services.basic import all_instruments as rqdata_all_instruments
 from rqdatac.services.get_price import get_price as rqdata_get_price
@@ -27,6 +28,55 @@ INTERVAL_ADJUSTMENT_MAP = {
 
 CHINA_TZ = timezone("Asia/Shanghai")
 
+TICK_FIELD_MAP = {
+    "open": "open_price",
+    "high": "high_price",
+    "low": "low_price",
+    "prev_close": "pre_close",
+    "last": "last_price",
+    "volume": "volume",
+    "limit_up": "limit_up",
+    "limit_down": "limit_down",
+    "b1": "bid_price_1",
+    "b2": "bid_price_2",
+    "b3": "bid_price_3",
+    "b4": "bid_price_4",
+    "b5": "bid_price_5",
+    "a1": "ask_price_1",
+    "a2": "ask_price_2",
+    "a3": "ask_price_3",
+    "a4": "ask_price_4",
+    "a5": "ask_price_5",
+    "b1_v": "bid_volume_1",
+    "b2_v": "bid_volume_2",
+    "b3_v": "bid_volume_3",
+    "b4_v": "bid_volume_4",
+    "b5_v": "bid_volume_5",
+    "a1_v": "ask_volume_1",
+    "a2_v": "ask_volume_2",
+    "a3_v": "ask_volume_3",
+    "a4_v": "ask_volume_4",
+    "a5_v": "ask_volume_5",
+}
+
+
+def to_datetimes(df: DataFrame, adjustment: timedelta = timedelta()) -> List[datetime]:
+    """
+    Adjust and localize datetime index of the whole DataFrame at once.
+    """
+    index = df.index - adjustment
+    index = index.tz_localize(CHINA_TZ)
+    return list(index.to_pydatetime())
+
+
+def get_column(df: DataFrame, name: str) -> list:
+    """
+    Get column values as list, or zeros if column not in DataFrame.
+    """
+    if name in df:
+        return df[name].tolist()
+    return [0] * len(df)
+
 
 class RqdataClient:
     """
@@ -177,21 +227,28 @@ class RqdataClient:
         data: List[BarData] = []
 
         if df is not None:
-            for ix, row in df.iterrows():
-                dt = row.name.to_pydatetime() - adjustment
-                dt = CHINA_TZ.localize(dt)
+            columns = zip(
+                to_datetimes(df, adjustment),
+                df["open"].tolist(),
+                df["high"].tolist(),
+                df["low"].tolist(),
+                df["close"].tolist(),
+                df["volume"].tolist(),
+                get_column(df, "open_interest")
+            )
 
+            for dt, open_price, high_price, low_price, close_price, volume, open_interest in columns:
                 bar = BarData(
                     symbol=symbol,
                     exchange=exchange,
                     interval=interval,
                     datetime=dt,
-                    open_price=row["open"],
-                    high_price=row["high"],
-                    low_price=row["low"],
-                    close_price=row["close"],
-                    volume=row["volume"],
-                    open_interest=row.get("open_interest", 0),
+                    open_price=open_price,
+                    high_price=high_price,
+                    low_price=low_price,
+                    close_price=close_price,
+                    volume=volume,
+                    open_interest=open_interest,
                     gateway_name="RQ"
                 )
 
@@ -264,44 +321,17 @@ class RqdataClient:
         data: List[TickData] = []
 
         if df is not None:
-            for ix, row in df.iterrows():
-                dt = row.name.to_pydatetime()
-                dt = CHINA_TZ.localize(dt)
+            names = list(TICK_FIELD_MAP.values()) + ["open_interest"]
+            columns = [df[name].tolist() for name in TICK_FIELD_MAP.keys()]
+            columns.append(get_column(df, "open_interest"))
 
+            for dt, values in zip(to_datetimes(df), zip(*columns)):
                 tick = TickData(
                     symbol=symbol,
                     exchange=exchange,
                     datetime=dt,
-                    open_price=row["open"],
-                    high_price=row["high"],
-                    low_price=row["low"],
-                    pre_close=row["prev_close"],
-                    last_price=row["last"],
-                    volume=row["volume"],
-                    open_interest=row.get("open_interest", 0),
-                    limit_up=row["limit_up"],
-                    limit_down=row["limit_down"],
-                    bid_price_1=row["b1"],
-                    bid_price_2=row["b2"],
-                    bid_price_3=row["b3"],
-                    bid_price_4=row["b4"],
-                    bid_price_5=row["b5"],
-                    ask_price_1=row["a1"],
-                    ask_price_2=row["a2"],
-                    ask_price_3=row["a3"],
-                    ask_price_4=row["a4"],
-                    ask_price_5=row["a5"],
-                    bid_volume_1=row["b1_v"],
-                    bid_volume_2=row["b2_v"],
-                    bid_volume_3=row["b3_v"],
-                    bid_volume_4=row["b4_v"],
-                    bid_volume_5=row["b5_v"],
-                    ask_volume_1=row["a1_v"],
-                    ask_volume_2=row["a2_v"],
-                    ask_volume_3=row["a3_v"],
-                    ask_volume_4=row["a4_v"],
-                    ask_volume_5=row["a5_v"],
-                    gateway_name="RQ"
+                    gateway_name="RQ",
+                    **dict(zip(names, values))
                 )
 
                 data.append(tick)
@@ -17,6 +17,11 @@ SETTINGS: Dict[str, Any] = {
     "log.console": True,
     "log.file": True,
 
+    "event.topic_dispatch": False,              # put keyed events into queue only once
+    "event.worker_count": 1,                    # shard events to workers by vt_symbol if > 1
+    "event.monitor_interval": 0,                # seconds between monitor events, 0 to disable
+    "event.priority_lanes": False,              # process order/trade before tick, log and timer
+
     "email.server": "smtp.qq.com",
     "email.port": 465,
     "email.username": "",
@@ -29,12 +34,18 @@ SETTINGS: Dict[str, Any] = {
 
     "database.timezone": get_localzone().zone,
     "database.driver": "sqlite",                # see database.Driver
-    "database.database": "database.db",         # for sqlite, use this as filepath
+    "database.database": "database.db",         # for sqlite use this as filepath, for parquet as folder
     "database.host": "localhost",
     "database.port": 3306,
     "database.user": "root",
     "database.password": "",
     "database.authentication_source": "admin",  # for mongodb
+    "database.chunk_size": 50,                  # rows per insert statement for sql
+    "database.slot_data": False,                # load data as SlotBarData/SlotTickData to save memory
+
+    "datafile.folder": "datafile",              # folder of memory mapped data files
+    "datafile.backtesting": False,              # load backtesting data from data files
+    "datafile.recording": False,                # save recorded data into data files too
 
     "genus.parent_host": "",
     "genus.parent_port": "",
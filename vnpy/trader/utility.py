@@ -6,9 +6,13 @@ import json
 import logging
 import sys
 from pathlib import Path
-from typing import Callable, Dict, Tuple, Union, Optional
+from typing import Any, Callable, Dict, List, Tuple, Union, Optional, Sequence, Iterator
 from decimal import Decimal
-from math import floor, ceil
+from math import floor, ceil, sqrt
+from collections import deque
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from operator import itemgetter
 
 import numpy as np
 
@@ -19,7 +23,7 @@ import csv
 import re
 from pandas import DataFrame
 from .futures import FuturesProductDict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone, tzinfo
 
 log_formatter = logging.Formatter('[%(asctime)s] %(message)s')
 
@@ -236,6 +240,78 @@ def get_digits(value: float) -> int:
         return 0
 
 
+class DatetimeBuilder:
+    """
+    Build timezone aware datetime from date and time fields directly,
+    without strptime and localize for every update.
+
+    Year, month, day and tzinfo of each date are cached, so the timezone
+    should have fixed utc offset during the day (e.g. Asia/Shanghai).
+    """
+
+    def __init__(self, tz: tzinfo):
+        """"""
+        self.tz: tzinfo = tz
+        self.dates: Dict[Union[str, int], tuple] = {}
+
+    def get_date(self, date: Union[str, int]) -> tuple:
+        """
+        Get (year, month, day, tzinfo) of date in YYYYMMDD format.
+        """
+        info = self.dates.get(date, None)
+        if info:
+            return info
+
+        if isinstance(date, str):
+            year, month, day = int(date[:4]), int(date[4:6]), int(date[6:8])
+        else:
+            year, month, day = date // 10000, date // 100 % 100, date % 100
+
+        midnight = self.tz.localize(datetime(year, month, day))
+        info = (year, month, day, midnight.tzinfo)
+        self.dates[date] = info
+
+        return info
+
+    def build_from_time(
+        self,
+        date: Union[str, int],
+        time: str,
+        microsecond: int = 0
+    ) -> datetime:
+        """
+        Build datetime from date and time string in HH:MM:SS format.
+        """
+        year, month, day, tz = self.get_date(date)
+        return datetime(
+            year,
+            month,
+            day,
+            int(time[0:2]),
+            int(time[3:5]),
+            int(time[6:8]),
+            microsecond,
+            tz
+        )
+
+    def build_from_int(self, value: int) -> datetime:
+        """
+        Build datetime from integer in YYYYMMDDHHMMSSsss format.
+        """
+        date, time = divmod(value, 1_000_000_000)
+        year, month, day, tz = self.get_date(date)
+        return datetime(
+            year,
+            month,
+            day,
+            time // 10_000_000,
+            time // 100_000 % 100,
+            time // 1000 % 100,
+            time % 1000 * 1000,
+            tz
+        )
+
+
 class BarGenerator:
     """
     For:
@@ -468,6 +544,340 @@ class BarGenerator:
         return bar
 
 
+class ShiftArray:
+    """
+    Fixed size float time series which shifts the whole array on append.
+    """
+
+    def __init__(self, size: int, fill: float = 0.0):
+        """Constructor"""
+        self.array: np.ndarray = np.full(size, fill)
+
+    def append(self, value: float) -> None:
+        """
+        Append new value and drop the oldest one.
+        """
+        self.array[:-1] = self.array[1:]
+        self.array[-1] = value
+
+
+class RingArray:
+    """
+    Fixed size float time series with O(1) append.
+
+    Values are written twice into a double-length buffer, so the latest
+    size values are always available as one contiguous numpy view in
+    chronological order.
+    """
+
+    def __init__(self, size: int, fill: float = 0.0):
+        """Constructor"""
+        self.size: int = size
+        self.pos: int = 0
+        self.buffer: np.ndarray = np.full(size * 2, fill)
+
+    def append(self, value: float) -> None:
+        """
+        Append new value and drop the oldest one.
+        """
+        pos = self.pos
+        self.buffer[pos] = value
+        self.buffer[pos + self.size] = value
+
+        pos += 1
+        if pos == self.size:
+            pos = 0
+        self.pos = pos
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        Get chronologically ordered view of the buffer.
+        """
+        return self.buffer[self.pos:self.pos + self.size]
+
+
+class Indicator:
+    """
+    Incremental technical indicator kept by ArrayManager.
+
+    The indicator state is updated once per bar in O(1), latest value is
+    stored in value and output history of the same length as the price
+    arrays is stored in history.
+    """
+
+    def __init__(self, size: int):
+        """Constructor"""
+        self.value: float = np.nan
+        self.history: RingArray = RingArray(size, np.nan)
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """
+        Update new bar prices into indicator and record output value.
+        """
+        self.value = self.calculate(high, low, close)
+        self.history.append(self.value)
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """
+        Calculate new indicator value, to be implemented by subclasses.
+        """
+        pass
+
+
+class RollingWindow:
+    """
+    Last n input values with running sum and sum of squares.
+    """
+
+    def __init__(self, n: int):
+        """Constructor"""
+        self.n: int = n
+        self.count: int = 0
+        self.pos: int = 0
+        self.values: list = [0.0] * n
+
+        self.total: float = 0.0
+        self.square_total: float = 0.0
+
+    def append(self, value: float) -> None:
+        """
+        Add new value into window and remove the oldest one.
+        """
+        old = self.values[self.pos]
+        self.values[self.pos] = value
+
+        self.total += value - old
+        self.square_total += value * value - old * old
+
+        self.pos += 1
+        self.count += 1
+
+        # Re-sum once per full cycle to stop floating point error drifting
+        if self.pos == self.n:
+            self.pos = 0
+            self.total = sum(self.values)
+            self.square_total = sum(v * v for v in self.values)
+
+    @property
+    def full(self) -> bool:
+        """"""
+        return self.count >= self.n
+
+
+class SmaIndicator(Indicator):
+    """Simple moving average of close price."""
+
+    def __init__(self, size: int, n: int):
+        """"""
+        super().__init__(size)
+        self.window: RollingWindow = RollingWindow(n)
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        window = self.window
+        window.append(close)
+
+        if not window.full:
+            return np.nan
+        return window.total / window.n
+
+
+class StdIndicator(Indicator):
+    """Population standard deviation of close price."""
+
+    def __init__(self, size: int, n: int):
+        """"""
+        super().__init__(size)
+        self.window: RollingWindow = RollingWindow(n)
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        window = self.window
+        window.append(close)
+
+        if not window.full:
+            return np.nan
+
+        mean = window.total / window.n
+        variance = window.square_total / window.n - mean * mean
+        return sqrt(max(variance, 0))
+
+
+class EmaIndicator(Indicator):
+    """Exponential moving average of close price, seeded with SMA."""
+
+    def __init__(self, size: int, n: int):
+        """"""
+        super().__init__(size)
+        self.n: int = n
+        self.k: float = 2 / (n + 1)
+        self.count: int = 0
+        self.ema: float = 0
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        self.count += 1
+
+        if self.count < self.n:
+            self.ema += close
+            return np.nan
+        elif self.count == self.n:
+            self.ema = (self.ema + close) / self.n
+        else:
+            self.ema += (close - self.ema) * self.k
+
+        return self.ema
+
+
+class WilderAverage:
+    """
+    Wilder smoothing of an input series, seeded with mean of first n values.
+    """
+
+    def __init__(self, n: int):
+        """Constructor"""
+        self.n: int = n
+        self.count: int = 0
+        self.value: float = 0
+
+    def append(self, value: float) -> bool:
+        """
+        Add new value, return whether average is available.
+        """
+        self.count += 1
+
+        if self.count < self.n:
+            self.value += value
+            return False
+        elif self.count == self.n:
+            self.value = (self.value + value) / self.n
+        else:
+            self.value = (self.value * (self.n - 1) + value) / self.n
+
+        return True
+
+
+class AtrIndicator(Indicator):
+    """Average true range with Wilder smoothing."""
+
+    def __init__(self, size: int, n: int):
+        """"""
+        super().__init__(size)
+        self.average: WilderAverage = WilderAverage(n)
+        self.last_close: float = None
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        last_close = self.last_close
+        self.last_close = close
+
+        if last_close is None:
+            return np.nan
+
+        tr = max(high, last_close) - min(low, last_close)
+        if not self.average.append(tr):
+            return np.nan
+        return self.average.value
+
+
+class RsiIndicator(Indicator):
+    """Relative strength index with Wilder smoothing."""
+
+    def __init__(self, size: int, n: int):
+        """"""
+        super().__init__(size)
+        self.gain: WilderAverage = WilderAverage(n)
+        self.loss: WilderAverage = WilderAverage(n)
+        self.last_close: float = None
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        last_close = self.last_close
+        self.last_close = close
+
+        if last_close is None:
+            return np.nan
+
+        change = close - last_close
+        self.gain.append(max(change, 0))
+        if not self.loss.append(max(-change, 0)):
+            return np.nan
+
+        total = self.gain.value + self.loss.value
+        if not total:
+            return 0
+        return 100 * self.gain.value / total
+
+
+class CciIndicator(Indicator):
+    """
+    Commodity channel index of typical price.
+
+    The rolling mean is kept incrementally, while mean deviation around
+    the current mean still has to scan the n values in window.
+    """
+
+    def __init__(self, size: int, n: int):
+        """"""
+        super().__init__(size)
+        self.window: RollingWindow = RollingWindow(n)
+        self.prices: RingArray = RingArray(n)
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        tp = (high + low + close) / 3
+        window = self.window
+        window.append(tp)
+        self.prices.append(tp)
+
+        if not window.full:
+            return np.nan
+
+        mean = window.total / window.n
+        deviation = np.abs(self.prices.array - mean).mean()
+        if not deviation:
+            return 0
+        return (tp - mean) / (0.015 * deviation)
+
+
+class ExtremumIndicator(Indicator):
+    """
+    Rolling max of high price or min of low price, kept with monotonic deque.
+    """
+
+    def __init__(self, size: int, n: int, maximum: bool):
+        """"""
+        super().__init__(size)
+        self.n: int = n
+        self.maximum: bool = maximum
+        self.count: int = 0
+        self.candidates: deque = deque()
+
+    def calculate(self, high: float, low: float, close: float) -> float:
+        """"""
+        candidates = self.candidates
+
+        if self.maximum:
+            price = high
+            while candidates and candidates[-1][1] <= price:
+                candidates.pop()
+        else:
+            price = low
+            while candidates and candidates[-1][1] >= price:
+                candidates.pop()
+
+        candidates.append((self.count, price))
+        self.count += 1
+
+        if candidates[0][0] <= self.count - 1 - self.n:
+            candidates.popleft()
+
+        if self.count < self.n:
+            return np.nan
+        return candidates[0][1]
+
+
 class ArrayManager(object):
     """
     For:
@@ -475,18 +885,31 @@ class ArrayManager(object):
     2. calculating technical indicator value
     """
 
-    def __init__(self, size: int = 100):
-        """Constructor"""
+    def __init__(self, size: int = 100, ring_buffer: bool = False):
+        """
+        Constructor.
+
+        With ring_buffer enabled, new bar is written into circular buffers
+        in O(1) instead of shifting the whole arrays on every update.
+        """
         self.count: int = 0
         self.size: int = size
         self.inited: bool = False
+        self.ring_buffer: bool = ring_buffer
 
-        self.open_array: np.ndarray = np.zeros(size)
-        self.high_array: np.ndarray = np.zeros(size)
-        self.low_array: np.ndarray = np.zeros(size)
-        self.close_array: np.ndarray = np.zeros(size)
-        self.volume_array: np.ndarray = np.zeros(size)
-        self.open_interest_array: np.ndarray = np.zeros(size)
+        if ring_buffer:
+            buffer_class = RingArray
+        else:
+            buffer_class = ShiftArray
+
+        self.open_buffer = buffer_class(size)
+        self.high_buffer = buffer_class(size)
+        self.low_buffer = buffer_class(size)
+        self.close_buffer = buffer_class(size)
+        self.volume_buffer = buffer_class(size)
+        self.open_interest_buffer = buffer_class(size)
+
+        self.indicators: Dict[tuple, Indicator] = {}
 
     def update_bar(self, bar: BarData) -> None:
         """
@@ -496,61 +919,540 @@ class ArrayManager(object):
         if not self.inited and self.count >= self.size:
             self.inited = True
 
-        self.open_array[:-1] = self.open_array[1:]
-        self.high_array[:-1] = self.high_array[1:]
-        self.low_array[:-1] = self.low_array[1:]
-        self.close_array[:-1] = self.close_array[1:]
-        self.volume_array[:-1] = self.volume_array[1:]
-        self.open_interest_array[:-1] = self.open_interest_array[1:]
+        self.open_buffer.append(bar.open_price)
+        self.high_buffer.append(bar.high_price)
+        self.low_buffer.append(bar.low_price)
+        self.close_buffer.append(bar.close_price)
+        self.volume_buffer.append(bar.volume)
+        self.open_interest_buffer.append(bar.open_interest)
 
-        self.open_array[-1] = bar.open_price
-        self.high_array[-1] = bar.high_price
-        self.low_array[-1] = bar.low_price
-        self.close_array[-1] = bar.close_price
-        self.volume_array[-1] = bar.volume
-        self.open_interest_array[-1] = bar.open_interest
+        for indicator in self.indicators.values():
+            indicator.update(bar.high_price, bar.low_price, bar.close_price)
 
     @property
     def open(self) -> np.ndarray:
         """
         Get open price time series.
         """
-        return self.open_array
+        return self.open_buffer.array
 
     @property
     def high(self) -> np.ndarray:
         """
         Get high price time series.
         """
-        return self.high_array
+        return self.high_buffer.array
 
     @property
     def low(self) -> np.ndarray:
         """
         Get low price time series.
         """
-        return self.low_array
+        return self.low_buffer.array
 
     @property
     def close(self) -> np.ndarray:
         """
         Get close price time series.
         """
-        return self.close_array
+        return self.close_buffer.array
 
     @property
     def volume(self) -> np.ndarray:
         """
         Get trading volume time series.
         """
-        return self.volume_array
+        return self.volume_buffer.array
 
     @property
     def open_interest(self) -> np.ndarray:
         """
         Get trading volume time series.
         """
-        return self.open_interest_array
+        return self.open_interest_buffer.array
+
+    @property
+    def open_array(self) -> np.ndarray:
+        """"""
+        return self.open_buffer.array
+
+    @property
+    def high_array(self) -> np.ndarray:
+        """"""
+        return self.high_buffer.array
+
+    @property
+    def low_array(self) -> np.ndarray:
+        """"""
+        return self.low_buffer.array
+
+    @property
+    def close_array(self) -> np.ndarray:
+        """"""
+        return self.close_buffer.array
+
+    @property
+    def volume_array(self) -> np.ndarray:
+        """"""
+        return self.volume_buffer.array
+
+    @property
+    def open_interest_array(self) -> np.ndarray:
+        """"""
+        return self.open_interest_buffer.array
+
+    def get_indicator(self, indicator_class: type, *params) -> Indicator:
+        """
+        Get incremental indicator, create it with bar history if not exists.
+        """
+        key = (indicator_class, params)
+        indicator = self.indicators.get(key, None)
+
+        if not indicator:
+            indicator = indicator_class(self.size, *params)
+
+            count = min(self.count, self.size)
+            if count:
+                highs = self.high[-count:]
+                lows = self.low[-count:]
+                closes = self.close[-count:]
+                for high, low, close in zip(highs, lows, closes):
+                    indicator.update(high, low, close)
+
+            self.indicators[key] = indicator
+
+        return indicator
+
+    def get_result(
+        self,
+        indicator_class: type,
+        array: bool,
+        *params
+    ) -> Union[float, np.ndarray]:
+        """
+        Get latest value or output history of incremental indicator.
+        """
+        indicator = self.get_indicator(indicator_class, *params)
+        if array:
+            return indicator.history.array
+        return indicator.value
+
+    def sma(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
+        """
+        Simple moving average.
+        """
+        return self.get_result(SmaIndicator, array, n)
+
+    def ema(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
+        """
+        Exponential moving average.
+        """
+        return self.get_result(EmaIndicator, array, n)
+
+    def std(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
+        """
+        Standard deviation.
+        """
+        return self.get_result(StdIndicator, array, n)
+
+    def atr(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
+        """
+        Average True Range (ATR).
+        """
+        return self.get_result(AtrIndicator, array, n)
+
+    def rsi(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
+        """
+        Relative Strenght Index (RSI).
+        """
+        return self.get_result(RsiIndicator, array, n)
+
+    def cci(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
+        """
+        Commodity Channel Index (CCI).
+        """
+        return self.get_result(CciIndicator, array, n)
+
+    def boll(
+        self,
+        n: int,
+        dev: float,
+        array: bool = False
+    ) -> Union[
+        Tuple[np.ndarray, np.ndarray],
+        Tuple[float, float]
+    ]:
+        """
+        Bollinger Channel.
+        """
+        mid = self.sma(n, array)
+        std = self.std(n, array)
+
+        up = mid + std * dev
+        down = mid - std * dev
+
+        return up, down
+
+    def keltner(
+        self,
+        n: int,
+        dev: float,
+        array: bool = False
+    ) -> Union[
+        Tuple[np.ndarray, np.ndarray],
+        Tuple[float, float]
+    ]:
+        """
+        Keltner Channel.
+        """
+        mid = self.sma(n, array)
+        atr = self.atr(n, array)
+
+        up = mid + atr * dev
+        down = mid - atr * dev
+
+        return up, down
+
+    def donchian(
+        self,
+        n: int,
+        array: bool = False
+    ) -> Union[
+        Tuple[np.ndarray, np.ndarray],
+        Tuple[float, float]
+    ]:
+        """
+        Donchian Channel.
+        """
+        up = self.get_result(ExtremumIndicator, array, n, True)
+        down = self.get_result(ExtremumIndicator, array, n, False)
+
+        return up, down
+
+
+BAR_FIELDS = [
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+    "open_interest"
+]
+
+BAR_DTYPE = np.dtype(
+    [("datetime", "datetime64[us]")] + [(name, "f8") for name in BAR_FIELDS]
+)
+
+TICK_FIELDS = [
+    "volume",
+    "open_interest",
+    "last_price",
+    "last_volume",
+    "limit_up",
+    "limit_down",
+    "open_price",
+    "high_price",
+    "low_price",
+    "pre_close",
+    "bid_price_1",
+    "bid_price_2",
+    "bid_price_3",
+    "bid_price_4",
+    "bid_price_5",
+    "ask_price_1",
+    "ask_price_2",
+    "ask_price_3",
+    "ask_price_4",
+    "ask_price_5",
+    "bid_volume_1",
+    "bid_volume_2",
+    "bid_volume_3",
+    "bid_volume_4",
+    "bid_volume_5",
+    "ask_volume_1",
+    "ask_volume_2",
+    "ask_volume_3",
+    "ask_volume_4",
+    "ask_volume_5",
+]
+
+TICK_DTYPE = np.dtype(
+    [("datetime", "datetime64[us]")] + [(name, "f8") for name in TICK_FIELDS]
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class BarArray:
+    """
+    Columnar container of bar data stored in numpy structured array.
+
+    Datetime is stored as UTC timestamp, and BarData object is only created
+    when an item is accessed, so long history costs a fraction of the
+    memory used by a list of BarData.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        tz: tzinfo = None,
+        gateway_name: str = "DB"
+    ):
+        """Constructor"""
+        self.data: np.ndarray = data
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.interval: Interval = interval
+        self.tz: tzinfo = tz
+        self.gateway_name: str = gateway_name
+
+        self.timestamps: np.ndarray = data["datetime"].view(np.int64)
+        self.cached_hour: int = None
+        self.cached_base: datetime = None
+
+    @classmethod
+    def from_bars(
+        cls,
+        bars: Sequence[BarData],
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> "BarArray":
+        """
+        Create bar array from a sequence of BarData.
+        """
+        data = np.empty(len(bars), dtype=BAR_DTYPE)
+        if not bars:
+            return cls(data, symbol, exchange, interval)
+
+        data["datetime"] = [
+            round(bar.datetime.timestamp() * 1_000_000) for bar in bars
+        ]
+        for name in BAR_FIELDS:
+            data[name] = [getattr(bar, name) for bar in bars]
+
+        bar = bars[0]
+        return cls(
+            data,
+            symbol,
+            exchange,
+            interval,
+            bar.datetime.tzinfo,
+            bar.gateway_name
+        )
+
+    def concat(self, *others: "BarArray") -> "BarArray":
+        """
+        Return a new bar array with data of others appended.
+        """
+        arrays = [array for array in (self, *others) if len(array)]
+        if not arrays:
+            return self
+        elif len(arrays) == 1:
+            return arrays[0]
+
+        first = arrays[0]
+        data = np.concatenate([array.data for array in arrays])
+
+        return BarArray(
+            data,
+            first.symbol,
+            first.exchange,
+            first.interval,
+            first.tz,
+            first.gateway_name
+        )
+
+    def convert_timestamp(self, timestamp: int) -> datetime:
+        """
+        Convert UTC timestamp in microseconds into datetime of bar array timezone.
+
+        UTC offset is cached per hour since timezone conversion is much
+        slower than the rest of bar creation.
+        """
+        hour = timestamp // 3_600_000_000
+
+        if hour != self.cached_hour:
+            utc_hour = EPOCH + timedelta(hours=hour)
+            local_hour = utc_hour.astimezone(self.tz)
+            if not self.tz:
+                local_hour = local_hour.replace(tzinfo=None)
+
+            self.cached_hour = hour
+            self.cached_base = local_hour - timedelta(hours=hour)
+
+        return self.cached_base + timedelta(microseconds=timestamp)
+
+    def to_bar(self, ix: int) -> BarData:
+        """
+        Create BarData object of the item at ix.
+        """
+        (
+            _,
+            open_price,
+            high_price,
+            low_price,
+            close_price,
+            volume,
+            open_interest
+        ) = self.data[ix].item()
+
+        dt = self.convert_timestamp(int(self.timestamps[ix]))
+
+        return BarData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=dt,
+            interval=self.interval,
+            volume=volume,
+            open_interest=open_interest,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            close_price=close_price,
+            gateway_name=self.gateway_name
+        )
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.data)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[BarData, "BarArray"]:
+        """
+        Return BarData for integer index, or bar array view for slice.
+        """
+        if isinstance(key, slice):
+            return BarArray(
+                self.data[key],
+                self.symbol,
+                self.exchange,
+                self.interval,
+                self.tz,
+                self.gateway_name
+            )
+        return self.to_bar(key)
+
+    def __iter__(self) -> Iterator[BarData]:
+        """"""
+        for ix in range(len(self.data)):
+            yield self.to_bar(ix)
+
+
+MATCHING_COUNTER = count()
+INF = float("inf")
+
+
+class MatchingBook:
+    """
+    Active orders sorted by price, for crossing orders in backtesting.
+
+    For limit book, long orders are filled when price >= long cross price
+    and short orders when price <= short cross price. For stop book the
+    conditions are reversed. Only orders meeting the condition are
+    visited, so cost per bar does not grow with total number of orders.
+
+    Results are returned as (sequence, order) sorted by sequence. The
+    sequence is shared by all books, so results of several books can be
+    merged to keep the order in which orders were sent.
+    """
+
+    def __init__(self, stop: bool = False):
+        """"""
+        self.stop: bool = stop
+
+        self.long_orders: list = []     # (price, sequence, key)
+        self.short_orders: list = []    # (price, sequence, key)
+        self.orders: Dict[str, tuple] = {}      # key: (is_long, price, sequence, order)
+        self.new_keys: List[str] = []
+
+    def add_order(self, key: str, order: Any, is_long: bool, price: float) -> None:
+        """"""
+        sequence = next(MATCHING_COUNTER)
+
+        if is_long:
+            insort(self.long_orders, (price, sequence, key))
+        else:
+            insort(self.short_orders, (price, sequence, key))
+
+        self.orders[key] = (is_long, price, sequence, order)
+        self.new_keys.append(key)
+
+    def remove_order(self, key: str) -> Any:
+        """
+        Remove order from book and return it, or None if not found.
+        """
+        item = self.orders.pop(key, None)
+        if not item:
+            return None
+        is_long, price, sequence, order = item
+
+        if is_long:
+            orders = self.long_orders
+        else:
+            orders = self.short_orders
+
+        ix = bisect_left(orders, (price, sequence, key))
+        orders.pop(ix)
+
+        return order
+
+    def match_orders(
+        self,
+        long_price: float,
+        short_price: float,
+        include_new: bool = False
+    ) -> List[Tuple[int, Any]]:
+        """
+        Get orders which can be crossed with given prices.
+
+        If include_new is True, orders added since last call are also
+        returned even if not crossed, for pushing status update of them.
+        """
+        if not self.orders:
+            self.new_keys.clear()
+            return []
+
+        if self.stop:
+            long_ix = bisect_right(self.long_orders, (long_price, INF))
+            matched = self.long_orders[:long_ix]
+
+            short_ix = bisect_left(self.short_orders, (short_price,))
+            matched.extend(self.short_orders[short_ix:])
+        else:
+            long_ix = bisect_left(self.long_orders, (long_price,))
+            matched = self.long_orders[long_ix:]
+
+            short_ix = bisect_right(self.short_orders, (short_price, INF))
+            matched.extend(self.short_orders[:short_ix])
+
+        orders = self.orders
+
+        if include_new and self.new_keys:
+            keys = set(item[2] for item in matched)
+            for key in self.new_keys:
+                if key in orders and key not in keys:
+                    matched.append((None, orders[key][2], key))
+        self.new_keys.clear()
+
+        if not matched:
+            return []
+
+        matched.sort(key=itemgetter(1))
+        return [(sequence, orders[key][3]) for _, sequence, key in matched]
+
+    def clear(self) -> None:
+        """"""
+        self.long_orders.clear()
+        self.short_orders.clear()
+        self.orders.clear()
+        self.new_keys.clear()
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.orders)
 
 
 def virtual(func: Callable) -> Callable: